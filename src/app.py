@@ -1,8 +1,32 @@
-from dash import Dash, html, dcc, Input, Output
-from crypto_analyzer import CryptoAnalyzer
+from dash import Dash, html, dcc, Input, Output, State, Patch
 import webbrowser
-from threading import Timer
+from threading import Timer, Thread, Lock
 import requests
+import time
+import os
+import numpy as np
+from dash.exceptions import PreventUpdate
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+try:
+    import waitress
+except ImportError:
+    waitress = None
+
+try:
+    from plotly_resampler import FigureResampler
+    RESAMPLER_AVAILABLE = True
+except ImportError:
+    RESAMPLER_AVAILABLE = False
 
 # Dicionário com explicações dos indicadores
 INDICATOR_EXPLANATIONS = {
@@ -58,17 +82,55 @@ INDICATOR_EXPLANATIONS = {
     '''
 }
 
+# Guia de indicadores (conteúdo estático, construído uma única vez)
+GUIDE_TAB_LABELS = [
+    ('price', 'Preço/BB'),
+    ('macd', 'MACD'),
+    ('rsi', 'RSI'),
+    ('volume', 'Volume'),
+]
+
+GUIDE_TABS = dcc.Tabs([
+    dcc.Tab(
+        label=label,
+        children=[dcc.Markdown(INDICATOR_EXPLANATIONS[key])],
+        className='custom-tab',
+        selected_className='custom-tab--selected'
+    )
+    for key, label in GUIDE_TAB_LABELS
+], className='custom-tabs')
+
 def open_browser():
     webbrowser.open('http://127.0.0.1:8050/')
 
+def get_indicator_backend():
+    """TA-Lib quando instalado, senão Numba (que cai para pandas se não estiver disponível)"""
+    from crypto_analyzer import TALIB_AVAILABLE
+    return 'talib' if TALIB_AVAILABLE else 'numba'
+
+# Sessão HTTP partilhada para reaproveitar conexões
+http_session = requests.Session()
+
+# Cache da taxa de câmbio USD/EUR (10 minutos)
+USD_EUR_RATE_TTL = 600
+_usd_eur_rate_cache = {'rate': None, 'expires_at': 0}
+
 # Função para obter taxa de câmbio USD/EUR
 def get_usd_eur_rate():
+    current_time = time.time()
+    if _usd_eur_rate_cache['rate'] is not None and current_time < _usd_eur_rate_cache['expires_at']:
+        return _usd_eur_rate_cache['rate']
+    
     try:
-        response = requests.get('https://api.exchangerate-api.com/v4/latest/USD')
+        response = http_session.get('https://api.exchangerate-api.com/v4/latest/USD', timeout=2)
         data = response.json()
-        return data['rates']['EUR']
+        rate = data['rates']['EUR']
     except:
         return 0.93  # Taxa aproximada caso a API falhe
+    
+    _usd_eur_rate_cache['rate'] = rate
+    _usd_eur_rate_cache['expires_at'] = current_time + USD_EUR_RATE_TTL
+    return rate
 
 # Lista atualizada com os símbolos corretos
 CRYPTO_COM_COINS = [
@@ -90,86 +152,233 @@ CRYPTO_COM_COINS = [
     {'symbol': 'TAO22974', 'label': 'Bittensor', 'balance': 0.04488, 'invested_eur': 24.07},
 ]
 
-# Inicializa o analisador com as criptomoedas da Crypto.com
-analyzer = CryptoAnalyzer([coin['symbol'] for coin in CRYPTO_COM_COINS[:2]])  # Começa com as 2 primeiras
-analyzer.fetch_data()
-analyzer.calculate_indicators()
+def warmup():
+    """Importa o analisador e compila os indicadores em segundo plano"""
+    # Importação diferida: pandas, yfinance, plotly e prophet são pesados
+    from crypto_analyzer import warmup_indicators
+    
+    # Compilar os kernels dos indicadores antes do primeiro callback
+    warmup_indicators()
+    
+    # Pré-carregar a carteira no cache apenas quando pedido (WARMUP=1)
+    if os.environ.get('WARMUP'):
+        get_analyzer([coin['symbol'] for coin in CRYPTO_COM_COINS], '1d')
 
 # Cria a aplicação Dash
 app = Dash(__name__)
 
+# O Dash serializa as respostas com o plotly.io; o orjson codifica arrays NumPy em C
+if orjson is not None:
+    import plotly.io as pio
+    pio.json.config.default_engine = 'orjson'
+
+# Compressão gzip das respostas (figuras e tabelas em JSON)
+if Compress is not None:
+    Compress(app.server)
+
+# Cache dos dados com indicadores por (símbolo, período): (DataFrame, timestamp)
+_ANALYZER_CACHE = {}
+
+def get_cache_ttl(period):
+    """Tempo de validade do cache em segundos (dados intradiários expiram mais cedo)"""
+    return 60 if period == '1d' else 300
+
+def get_analyzer(symbols, period):
+    """Cria um analisador reaproveitando os dados em cache ainda válidos"""
+    from crypto_analyzer import CryptoAnalyzer
+    
+    current_time = time.time()
+    ttl = get_cache_ttl(period)
+    
+    missing = [
+        symbol for symbol in symbols
+        if (symbol, period) not in _ANALYZER_CACHE
+        or current_time - _ANALYZER_CACHE[(symbol, period)][1] >= ttl
+    ]
+    
+    # Buscar apenas os símbolos sem cache válido
+    if missing:
+        # float32 chega para gráficos e indicadores e reduz a memória do cache para metade
+        fetcher = CryptoAnalyzer(missing, backend=get_indicator_backend(), dtype=np.float32)
+        fetcher.fetch_data(period=period)
+        for symbol, df in fetcher.data.items():
+            _ANALYZER_CACHE[(symbol, period)] = (df, current_time)
+    
+    # Montar o analisador pela ordem original dos símbolos
+    analyzer = CryptoAnalyzer(symbols)
+    for symbol in symbols:
+        if (symbol, period) in _ANALYZER_CACHE:
+            analyzer.data[symbol] = _ANALYZER_CACHE[(symbol, period)][0]
+    return analyzer
+
+# Cache das figuras por (símbolos, período): (figura, timestamp)
+FIGURE_CACHE_TTL = 60
+FIGURE_CACHE_MAXSIZE = 32
+_FIGURE_CACHE = {}
+# O waitress atende vários pedidos em threads: a substituição de entradas é protegida
+_FIGURE_CACHE_LOCK = Lock()
+
+# Pontos por traço enviados ao browser pelo plotly-resampler (o zoom usa o _FIGURE_CACHE)
+RESAMPLER_SAMPLES = 1000
+
+# Carteira em estrutura de arrays (um array por campo) para os cálculos vetorizados
+SYMBOLS = np.array([coin['symbol'] for coin in CRYPTO_COM_COINS])
+LABELS = np.array([coin['label'] for coin in CRYPTO_COM_COINS])
+BALANCES = np.array([coin['balance'] for coin in CRYPTO_COM_COINS], dtype=np.float64)
+INVESTED = np.array([coin['invested_eur'] for coin in CRYPTO_COM_COINS], dtype=np.float64)
+
 # Função para calcular valor total da carteira
 def get_portfolio_summary(analyzer):
-    summary = []
-    total_eur = 0
-    total_invested = 0
     eur_rate = get_usd_eur_rate()
     
-    for coin in CRYPTO_COM_COINS:
-        symbol = coin['symbol']
-        balance = coin['balance']
-        invested = coin['invested_eur']
-        total_invested += invested
-        
-        try:
-            if symbol in analyzer.data and not analyzer.data[symbol].empty and len(analyzer.data[symbol]) >= 2:
-                current_price_usd = analyzer.data[symbol]['Close'].iloc[-1]
-                previous_price_usd = analyzer.data[symbol]['Close'].iloc[-2]
-                current_price_eur = current_price_usd * eur_rate
-                value_eur = balance * current_price_eur
-                
-                profit_eur = value_eur - invested
-                profit_percentage = ((value_eur - invested) / invested * 100) if invested > 0 else 0
-                
-                change_24h = ((current_price_usd - previous_price_usd) / previous_price_usd * 100)
-                
-                summary.append({
-                    'symbol': symbol,
-                    'label': coin['label'],
-                    'balance': balance,
-                    'price_eur': current_price_eur,
-                    'value_eur': value_eur,
-                    'invested_eur': invested,
-                    'profit_eur': profit_eur,
-                    'profit_percentage': profit_percentage,
-                    'change_24h': change_24h
-                })
-                
-                total_eur += value_eur
-            else:
-                # Se não houver dados, adicionar com valores zerados
-                summary.append({
-                    'symbol': symbol,
-                    'label': coin['label'],
-                    'balance': balance,
-                    'price_eur': 0,
-                    'value_eur': 0,
-                    'invested_eur': invested,
-                    'profit_eur': -invested,  # Todo o investimento é considerado perdido
-                    'profit_percentage': -100,
-                    'change_24h': 0
-                })
-                print(f"Aviso: Dados insuficientes para {symbol}")
-        except Exception as e:
-            print(f"Erro ao processar {symbol}: {str(e)}")
-            # Adicionar a moeda com valores zerados em caso de erro
-            summary.append({
-                'symbol': symbol,
-                'label': coin['label'],
-                'balance': balance,
-                'price_eur': 0,
-                'value_eur': 0,
-                'invested_eur': invested,
-                'profit_eur': -invested,
-                'profit_percentage': -100,
-                'change_24h': 0
-            })
+    # Últimos dois fechos de cada moeda, extraídos uma única vez
+    last_closes = {
+        symbol: df['Close'].to_numpy()[-2:]
+        for symbol, df in analyzer.data.items()
+        if df is not None and len(df) >= 2
+    }
+    
+    has_data = np.array([symbol in last_closes for symbol in SYMBOLS])
+    for symbol in SYMBOLS[~has_data]:
+        print(f"Aviso: Dados insuficientes para {symbol}")
+    
+    closes_usd = np.array([last_closes.get(symbol, (np.nan, np.nan)) for symbol in SYMBOLS], dtype=np.float64)
     
+    # Conversão USD -> EUR numa única operação sobre todos os preços
+    closes_eur = closes_usd * eur_rate
+    previous_price_eur, current_price_eur = closes_eur[:, 0], closes_eur[:, 1]
+    
+    # Moedas sem dados ficam com valores zerados (todo o investimento é considerado perdido)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price_eur = np.where(has_data, current_price_eur, 0.0)
+        value_eur = BALANCES * price_eur
+        profit_eur = value_eur - INVESTED
+        profit_percentage = np.where(
+            has_data,
+            np.where(INVESTED > 0, profit_eur / INVESTED * 100, 0.0),
+            -100.0
+        )
+        change_24h = np.where(has_data, (current_price_eur / previous_price_eur - 1) * 100, 0.0)
+    
+    summary = [
+        {
+            'symbol': symbol,
+            'label': label,
+            'balance': balance,
+            'price_eur': price,
+            'value_eur': value,
+            'invested_eur': invested,
+            'profit_eur': profit,
+            'profit_percentage': percentage,
+            'change_24h': change
+        }
+        for symbol, label, balance, price, value, invested, profit, percentage, change in zip(
+            SYMBOLS.tolist(), LABELS.tolist(), BALANCES.tolist(), price_eur.tolist(),
+            value_eur.tolist(), INVESTED.tolist(), profit_eur.tolist(),
+            profit_percentage.tolist(), change_24h.tolist()
+        )
+    ]
+    
+    total_eur = float(value_eur.sum())
+    total_invested = float(INVESTED.sum())
     total_profit = total_eur - total_invested
     total_profit_percentage = ((total_eur - total_invested) / total_invested * 100) if total_invested > 0 else 0
     
     return summary, total_eur, total_invested, total_profit, total_profit_percentage
 
+SUMMARY_CARD_TITLES = ['Valor Total', 'Total Investido', 'Lucro/Prejuízo', 'Retorno']
+PORTFOLIO_TABLE_HEADERS = ['Moeda', 'Quantidade', 'Preço (EUR)', 'Valor (EUR)', 'Investido', 'Lucro/Prejuízo', '24h %']
+
+def format_portfolio(portfolio):
+    """Converte o resumo da carteira no texto e classe de cada célula"""
+    if portfolio is None:
+        # Esqueleto mostrado antes do primeiro carregamento
+        return {
+            'totals': [['-', 'summary-value'] for _ in SUMMARY_CARD_TITLES],
+            'rows': [
+                [[f"{coin['label']} ({coin['symbol']})", ''], [f"{coin['balance']:,.8f}", '']]
+                + [['-', ''] for _ in PORTFOLIO_TABLE_HEADERS[2:]]
+                for coin in CRYPTO_COM_COINS
+            ]
+        }
+    
+    total_profit = portfolio['total_profit']
+    total_profit_percentage = portfolio['total_profit_percentage']
+    return {
+        'totals': [
+            [f"€{portfolio['total_eur']:,.2f}", 'summary-value'],
+            [f"€{portfolio['total_invested']:,.2f}", 'summary-value'],
+            [f'€{total_profit:+,.2f}', f'summary-value {"trend-up" if total_profit >= 0 else "trend-down"}'],
+            [f'{total_profit_percentage:+.2f}%', f'summary-value {"trend-up" if total_profit_percentage >= 0 else "trend-down"}'],
+        ],
+        'rows': [
+            [
+                [f"{coin['label']} ({coin['symbol']})", ''],
+                [f"{coin['balance']:,.8f}", ''],
+                [f"€{coin['price_eur']:,.2f}", ''],
+                [f"€{coin['value_eur']:,.2f}", ''],
+                [f"€{coin['invested_eur']:,.2f}", ''],
+                [
+                    f"€{coin['profit_eur']:+,.2f} ({coin['profit_percentage']:+.2f}%)",
+                    'trend-up' if coin['profit_eur'] >= 0 else 'trend-down'
+                ],
+                [
+                    f"{coin['change_24h']:+.2f}%" if coin['price_eur'] > 0 else "N/A",
+                    'trend-up' if coin['change_24h'] > 0 else 'trend-down'
+                ],
+            ]
+            for coin in portfolio['summary']
+        ]
+    }
+
+def build_portfolio_summary(cells):
+    """Constrói os cartões de resumo e a tabela completos"""
+    return [
+        # Cards de resumo
+        html.Div([
+            html.Div([
+                html.H3(title),
+                html.Div(text, className=class_name)
+            ], className='summary-card')
+            for title, (text, class_name) in zip(SUMMARY_CARD_TITLES, cells['totals'])
+        ], className='portfolio-overview'),
+        
+        # Tabela detalhada
+        html.Div([
+            html.Table([
+                html.Thead([
+                    html.Tr([html.Th(header) for header in PORTFOLIO_TABLE_HEADERS])
+                ]),
+                html.Tbody([
+                    html.Tr([html.Td(text, className=class_name) for text, class_name in row])
+                    for row in cells['rows']
+                ])
+            ], className='portfolio-table')
+        ], className='portfolio-table-container')
+    ]
+
+def patch_portfolio_summary(rendered, cells):
+    """Atualiza apenas as células cujo conteúdo mudou desde a última renderização"""
+    patch = Patch()
+    
+    cards = patch[0]['props']['children']
+    for i, (old, new) in enumerate(zip(rendered['totals'], cells['totals'])):
+        if old != new:
+            value = cards[i]['props']['children'][1]['props']
+            value['children'], value['className'] = new
+    
+    # Div da tabela -> Table -> Tbody -> linhas
+    rows = patch[1]['props']['children'][0]['props']['children'][1]['props']['children']
+    for i, (old_row, new_row) in enumerate(zip(rendered['rows'], cells['rows'])):
+        for j, (old, new) in enumerate(zip(old_row, new_row)):
+            if old != new:
+                cell = rows[i]['props']['children'][j]['props']
+                cell['children'], cell['className'] = new
+    
+    return patch
+
+PORTFOLIO_SKELETON = format_portfolio(None)
+
 # Define o layout
 app.layout = html.Div([
     html.Div([
@@ -183,7 +392,20 @@ app.layout = html.Div([
         html.Div([
             html.Div([
                 html.H2('Resumo da Carteira', className='section-title'),
-                html.Div(id='portfolio-summary', className='portfolio-summary'),
+                html.Div(
+                    build_portfolio_summary(PORTFOLIO_SKELETON),
+                    id='portfolio-summary',
+                    className='portfolio-summary'
+                ),
+                dcc.Store(id='portfolio-rendered', data=PORTFOLIO_SKELETON),
+                
+                # Atualização da carteira a cada minuto, independente do seletor
+                dcc.Interval(
+                    id='portfolio-refresh',
+                    interval=60*1000,  # em milissegundos (1 minuto)
+                    n_intervals=0
+                ),
+                dcc.Store(id='portfolio-store'),
             ], className='card'),
             
             # Container principal
@@ -233,32 +455,7 @@ app.layout = html.Div([
                 html.Div([
                     html.Div([
                         html.H2('Guia de Indicadores', className='section-title'),
-                        dcc.Tabs([
-                            dcc.Tab(
-                                label='Preço/BB',
-                                children=[dcc.Markdown(INDICATOR_EXPLANATIONS['price'])],
-                                className='custom-tab',
-                                selected_className='custom-tab--selected'
-                            ),
-                            dcc.Tab(
-                                label='MACD',
-                                children=[dcc.Markdown(INDICATOR_EXPLANATIONS['macd'])],
-                                className='custom-tab',
-                                selected_className='custom-tab--selected'
-                            ),
-                            dcc.Tab(
-                                label='RSI',
-                                children=[dcc.Markdown(INDICATOR_EXPLANATIONS['rsi'])],
-                                className='custom-tab',
-                                selected_className='custom-tab--selected'
-                            ),
-                            dcc.Tab(
-                                label='Volume',
-                                children=[dcc.Markdown(INDICATOR_EXPLANATIONS['volume'])],
-                                className='custom-tab',
-                                selected_className='custom-tab--selected'
-                            ),
-                        ], className='custom-tabs'),
+                        GUIDE_TABS,
                     ], className='card guide-container'),
                     
                     # Dicas e alertas
@@ -278,91 +475,96 @@ app.layout = html.Div([
      Input('period-selector', 'value')]
 )
 def update_graph(selected_cryptos, selected_period):
-    analyzer = CryptoAnalyzer(selected_cryptos)
-    analyzer.fetch_data(period=selected_period)
-    analyzer.calculate_indicators()
-    return analyzer.get_figure()
+    key = (tuple(selected_cryptos), selected_period)
+    current_time = time.time()
+    cached = _FIGURE_CACHE.get(key)
+    if cached and current_time - cached[1] < FIGURE_CACHE_TTL:
+        return cached[0]
+    
+    analyzer = get_analyzer(selected_cryptos, selected_period)
+    analyzer.compute_forecasts(selected_cryptos)
+    figure = analyzer.get_figure()
+    
+    # Enviar apenas uma amostra agregada dos pontos; o zoom pede mais detalhe ao servidor
+    if RESAMPLER_AVAILABLE:
+        figure = FigureResampler(
+            figure,
+            default_n_shown_samples=RESAMPLER_SAMPLES,
+            resampled_trace_prefix_suffix=('', ''),
+            show_mean_aggregation_size=False
+        )
+    
+    # Descartar a entrada mais antiga quando o cache está cheio
+    with _FIGURE_CACHE_LOCK:
+        if len(_FIGURE_CACHE) >= FIGURE_CACHE_MAXSIZE and key not in _FIGURE_CACHE:
+            oldest = min(_FIGURE_CACHE, key=lambda k: _FIGURE_CACHE[k][1])
+            _FIGURE_CACHE.pop(oldest, None)
+        _FIGURE_CACHE[key] = (figure, current_time)
+    return figure
+
+if RESAMPLER_AVAILABLE:
+    @app.callback(
+        Output('crypto-graph', 'figure', allow_duplicate=True),
+        Input('crypto-graph', 'relayoutData'),
+        [State('crypto-selector', 'value'),
+         State('period-selector', 'value')],
+        prevent_initial_call=True
+    )
+    def resample_graph(relayout_data, selected_cryptos, selected_period):
+        if not selected_cryptos or not relayout_data:
+            raise PreventUpdate
+        # A figura desta seleção (e não a última desenhada por outra sessão)
+        cached = _FIGURE_CACHE.get((tuple(selected_cryptos), selected_period))
+        figure = cached[0] if cached else update_graph(selected_cryptos, selected_period)
+        if not isinstance(figure, FigureResampler):
+            raise PreventUpdate
+        return figure.construct_update_data_patch(relayout_data)
 
 @app.callback(
-    Output('portfolio-summary', 'children'),
-    [Input('crypto-selector', 'value')]
+    Output('portfolio-store', 'data'),
+    [Input('portfolio-refresh', 'n_intervals')]
 )
-def update_portfolio_summary(selected_cryptos):
+def refresh_portfolio(n_intervals):
     try:
-        analyzer = CryptoAnalyzer([coin['symbol'] for coin in CRYPTO_COM_COINS])
-        analyzer.fetch_data(period='1d')
+        analyzer = get_analyzer([coin['symbol'] for coin in CRYPTO_COM_COINS], '1d')
         
         summary, total_eur, total_invested, total_profit, total_profit_percentage = get_portfolio_summary(analyzer)
         
-        return [
-            # Cards de resumo
-            html.Div([
-                html.Div([
-                    html.H3('Valor Total'),
-                    html.Div(f'€{total_eur:,.2f}', className='summary-value')
-                ], className='summary-card'),
-                
-                html.Div([
-                    html.H3('Total Investido'),
-                    html.Div(f'€{total_invested:,.2f}', className='summary-value')
-                ], className='summary-card'),
-                
-                html.Div([
-                    html.H3('Lucro/Prejuízo'),
-                    html.Div(
-                        f'€{total_profit:+,.2f}',
-                        className=f'summary-value {"trend-up" if total_profit >= 0 else "trend-down"}'
-                    )
-                ], className='summary-card'),
-                
-                html.Div([
-                    html.H3('Retorno'),
-                    html.Div(
-                        f'{total_profit_percentage:+.2f}%',
-                        className=f'summary-value {"trend-up" if total_profit_percentage >= 0 else "trend-down"}'
-                    )
-                ], className='summary-card'),
-            ], className='portfolio-overview'),
-            
-            # Tabela detalhada
-            html.Div([
-                html.Table([
-                    html.Thead([
-                        html.Tr([
-                            html.Th('Moeda'),
-                            html.Th('Quantidade'),
-                            html.Th('Preço (EUR)'),
-                            html.Th('Valor (EUR)'),
-                            html.Th('Investido'),
-                            html.Th('Lucro/Prejuízo'),
-                            html.Th('24h %')
-                        ])
-                    ]),
-                    html.Tbody([
-                        html.Tr([
-                            html.Td(f"{coin['label']} ({coin['symbol']})"),
-                            html.Td(f"{coin['balance']:,.8f}"),
-                            html.Td(f"€{coin['price_eur']:,.2f}"),
-                            html.Td(f"€{coin['value_eur']:,.2f}"),
-                            html.Td(f"€{coin['invested_eur']:,.2f}"),
-                            html.Td(
-                                f"€{coin['profit_eur']:+,.2f} ({coin['profit_percentage']:+.2f}%)",
-                                className='trend-up' if coin['profit_eur'] >= 0 else 'trend-down'
-                            ),
-                            html.Td(
-                                f"{coin['change_24h']:+.2f}%" if coin['price_eur'] > 0 else "N/A",
-                                className='trend-up' if coin['change_24h'] > 0 else 'trend-down'
-                            )
-                        ]) for coin in summary
-                    ])
-                ], className='portfolio-table')
-            ], className='portfolio-table-container')
-        ]
+        return {
+            'summary': summary,
+            'total_eur': total_eur,
+            'total_invested': total_invested,
+            'total_profit': total_profit,
+            'total_profit_percentage': total_profit_percentage
+        }
+    except Exception as e:
+        print(f"Erro ao atualizar resumo: {str(e)}")
+        return None
+
+@app.callback(
+    [Output('portfolio-summary', 'children'),
+     Output('portfolio-rendered', 'data')],
+    [Input('portfolio-store', 'data')],
+    [State('portfolio-rendered', 'data')]
+)
+def update_portfolio_summary(portfolio, rendered):
+    try:
+        if not portfolio:
+            raise ValueError("Resumo da carteira indisponível")
+        
+        cells = format_portfolio(portfolio)
+        
+        # Sem tabela no ecrã (ex.: após um erro) é preciso reconstruí-la
+        if rendered is None:
+            return build_portfolio_summary(cells), cells
+        return patch_portfolio_summary(rendered, cells), cells
     except Exception as e:
         print(f"Erro ao atualizar resumo: {str(e)}")
-        return html.Div("Erro ao carregar dados. Por favor, tente novamente.", className='error-message')
+        return html.Div("Erro ao carregar dados. Por favor, tente novamente.", className='error-message'), None
 
 def update_crypto_data(symbol):
+    from crypto_analyzer import CryptoAnalyzer
+    
     try:
         analyzer = CryptoAnalyzer()
         df = analyzer.get_crypto_data(symbol)
@@ -391,5 +593,10 @@ def update_crypto_data(symbol):
         }
 
 if __name__ == '__main__':
+    Thread(target=warmup, daemon=True).start()
     Timer(1, open_browser).start()
-    app.run_server(debug=False)
\ No newline at end of file
+    if waitress is not None:
+        # Servidor WSGI de produção, com vários pedidos em paralelo
+        waitress.serve(app.server, host='127.0.0.1', port=8050, threads=8)
+    else:
+        app.run(host='127.0.0.1', port=8050, debug=False)
@@ -0,0 +1,98 @@
+// Resumo da carteira de ações/ETFs calculado no browser a partir dos últimos preços
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    portfolio: {
+        render_summary: function(prices, holdings) {
+            if (!prices || !holdings) {
+                return window.dash_clientside.no_update;
+            }
+
+            function el(type, children, className) {
+                var props = {children: children};
+                if (className) {
+                    props.className = className;
+                }
+                return {type: type, namespace: 'dash_html_components', props: props};
+            }
+
+            // Equivalente a f'{x:,.Nf}' em Python
+            function fmt(value, digits, signed) {
+                var text = Math.abs(value).toLocaleString('en-US', {
+                    minimumFractionDigits: digits,
+                    maximumFractionDigits: digits
+                });
+                if (value < 0) {
+                    return '-' + text;
+                }
+                return (signed ? '+' : '') + text;
+            }
+
+            function money(value, digits, signed) {
+                // Mesmo formato do Python: €+1,234.56 / €-1,234.56
+                return '€' + fmt(value, digits, signed);
+            }
+
+            function trend(value) {
+                return value >= 0 ? 'trend-up' : 'trend-down';
+            }
+
+            var totalInvested = 0;
+            var totalCurrent = 0;
+            var rows = [];
+
+            holdings.forEach(function(stock) {
+                var currentPrice = prices[stock.symbol];
+                if (currentPrice === undefined || currentPrice === null) {
+                    return;
+                }
+                var invested = stock.quantity * stock.avg_price;
+                var currentValue = stock.quantity * currentPrice;
+                var changePct = (currentPrice - stock.avg_price) / stock.avg_price * 100;
+                var profitLoss = currentValue - invested;
+
+                totalInvested += invested;
+                totalCurrent += currentValue;
+
+                rows.push(el('Tr', [
+                    el('Td', stock.label + ' (' + stock.symbol + ')'),
+                    el('Td', fmt(stock.quantity, 0)),
+                    el('Td', money(stock.avg_price, 2)),
+                    el('Td', money(currentPrice, 2)),
+                    el('Td', money(invested, 2)),
+                    el('Td', money(currentValue, 2)),
+                    el('Td', fmt(changePct, 2, true) + '%', trend(changePct)),
+                    el('Td', money(profitLoss, 2, true), trend(profitLoss))
+                ]));
+            });
+
+            var totalChangePct = totalInvested > 0 ? (totalCurrent - totalInvested) / totalInvested * 100 : 0;
+            var profit = totalCurrent - totalInvested;
+
+            function card(title, value, className) {
+                return el('Div', [el('H3', title), el('Div', value, className)], 'summary-card');
+            }
+
+            var headers = ['Ativo', 'Quantidade', 'Preço Médio', 'Preço Atual',
+                           'Total Investido', 'Valor Atual', 'Retorno', 'Lucro/Prejuízo'];
+
+            return el('Div', [
+                // Resumo geral
+                el('Div', [
+                    card('Total Investido', money(totalInvested, 2), 'summary-value'),
+                    card('Valor Atual', money(totalCurrent, 2), 'summary-value'),
+                    card('Lucro/Prejuízo', money(profit, 2, true),
+                         'summary-value ' + (totalCurrent >= totalInvested ? 'trend-up' : 'trend-down')),
+                    card('Retorno', fmt(totalChangePct, 2, true) + '%',
+                         'summary-value ' + trend(totalChangePct))
+                ], 'portfolio-overview'),
+
+                // Tabela detalhada
+                el('Div', [
+                    el('Table', [
+                        el('Thead', [el('Tr', headers.map(function(h) { return el('Th', h); }))]),
+                        el('Tbody', rows)
+                    ], 'portfolio-table')
+                ], 'portfolio-table-container')
+            ]);
+        }
+    }
+});
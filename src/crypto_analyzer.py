@@ -5,42 +5,189 @@ from datetime import datetime, timedelta
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from prophet import Prophet
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import lru_cache
+from utils._njit import NUMBA_AVAILABLE
+from utils.indicators import compute_indicators, warmup_indicators
+from utils.sessions import YF_SESSION
 import calendar
+import time
+import os
+import importlib.util
+
+try:
+    from scipy.signal import lfilter
+except ImportError:
+    lfilter = None
+
+# O NeuralProphet (e o torch) só é importado ao treinar: importá-lo aqui atrasaria
+# o arranque de cada worker em vários segundos
+NEURALPROPHET_AVAILABLE = importlib.util.find_spec('neuralprophet') is not None
+
+try:
+    import talib
+    TALIB_AVAILABLE = True
+except ImportError:
+    TALIB_AVAILABLE = False
+
+# Tickers do Yahoo Finance já resolvidos para cada símbolo (ex.: 'BTC' -> 'BTC-USD')
+TICKER_SYMBOLS = {}
+
+# Objetos yf.Ticker reutilizados (mantêm sessão, cookies e crumb do Yahoo)
+_TICKERS = {}
+
+# Previsões por (símbolo, dias, modelo, data UTC), partilhadas entre instâncias
+_FORECAST_CACHE = {}
+
+# Histórico diário e DataFrame do Prophet por (símbolo, data UTC)
+_PROPHET_DATA_CACHE = {}
+
+# Dias de histórico diário usados para treinar a previsão
+FORECAST_HISTORY_DAYS = 730
+
+# Número máximo de downloads simultâneos no yfinance
+MAX_FETCH_WORKERS = 8
+
+# Colunas OHLCV devolvidas pelo yfinance
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Implementações disponíveis para o cálculo dos indicadores
+INDICATOR_BACKENDS = ('pandas', 'numba', 'talib')
+
+# Modelos disponíveis para a previsão de preços
+FORECASTERS = ('prophet', 'neuralprophet')
+
+# Amostras para o intervalo de incerteza do Prophet (por omissão usa 1000)
+PROPHET_UNCERTAINTY_SAMPLES = 100
+
+# Acima deste número de dias, o histórico do Prophet é subamostrado
+PROPHET_SUBSAMPLE_MIN_ROWS = 365
+
+# Número máximo de velas por símbolo enviadas para o gráfico
+MAX_CHART_POINTS = 2000
+
+# Horizonte (em dias) até ao qual se dispensam as sazonalidades anual e mensal
+SHORT_FORECAST_DAYS = 30
+
+# Cores diferentes para cada criptomoeda no gráfico
+COLORS = ['#00c853', '#2196f3', '#ff9800', '#e91e63', '#9c27b0', '#00bcd4']
 
 class CryptoAnalyzer:
-    def __init__(self, symbols=None):
+    def __init__(self, symbols=None, backend=None, dtype=None, forecaster='neuralprophet'):
         self.symbols = symbols if symbols else []
         self.data = {}
         self.predictions = {}
+        # Tipo numérico opcional para as colunas OHLCV (ex.: np.float32 para reduzir memória)
+        self.dtype = dtype
+        self.set_backend(backend)
+        self.set_forecaster(forecaster)
+    
+    def set_forecaster(self, forecaster):
+        """Define o modelo usado em predict_price"""
+        if forecaster not in FORECASTERS:
+            raise ValueError(f"Modelo de previsão desconhecido: {forecaster}")
+        if forecaster == 'neuralprophet' and not NEURALPROPHET_AVAILABLE:
+            forecaster = 'prophet'
+        self.forecaster = forecaster
+    
+    def set_backend(self, backend):
+        """Define a implementação usada em calculate_indicators (None escolhe a mais rápida)"""
+        if backend is None:
+            backend = 'numba' if NUMBA_AVAILABLE else 'pandas'
+        if backend not in INDICATOR_BACKENDS:
+            raise ValueError(f"Backend de indicadores desconhecido: {backend}")
+        if backend == 'numba' and not NUMBA_AVAILABLE:
+            print("Numba não está instalado, a usar pandas para os indicadores")
+            backend = 'pandas'
+        if backend == 'talib' and not TALIB_AVAILABLE:
+            print("TA-Lib não está instalado, a usar pandas para os indicadores")
+            backend = 'pandas'
+        self.backend = backend
         
-    def fetch_data(self, period='1d'):
+    def fetch_data(self, period='1d', indicators=True):
+        """Busca todos os símbolos num único pedido ao yfinance (com ou sem indicadores)"""
         print(f"Tentando buscar dados para: {self.symbols} com período {period}")
-        for symbol in self.symbols:
+        if not self.symbols:
+            return
+        
+        ticker_symbols = {symbol: get_ticker_symbol(symbol) for symbol in self.symbols}
+        interval = '1m' if period == '1d' else '1d'
+        
+        try:
+            raw = yf.download(
+                tickers=' '.join(ticker_symbols.values()),
+                period=period,
+                interval=interval,
+                group_by='ticker',
+                auto_adjust=True,
+                threads=True,
+                progress=False,
+                session=YF_SESSION
+            )
+        except Exception as e:
+            print(f"Erro ao buscar dados em lote: {str(e)}")
+            raw = pd.DataFrame()
+        
+        results = {}
+        for symbol, ticker_symbol in ticker_symbols.items():
+            if raw.empty:
+                continue
+            if isinstance(raw.columns, pd.MultiIndex):
+                if ticker_symbol not in raw.columns.get_level_values(0):
+                    continue
+                df = raw[ticker_symbol]
+            elif len(ticker_symbols) == 1:
+                df = raw
+            else:
+                continue
+            df = df.dropna(how='all')
+            if not df.empty:
+                results[symbol] = df.copy()
+        
+        # Símbolos que falharam no lote são buscados individualmente
+        missing = [symbol for symbol in self.symbols if symbol not in results]
+        if missing:
+            results.update(self._fetch_individually(missing, period))
+        
+        self._store_results(results)
+        if indicators:
+            self.calculate_indicators()
+    
+    def _fetch_individually(self, symbols, period):
+        """Busca cada símbolo em paralelo (I/O de rede)"""
+        if not symbols:
+            return {}
+        
+        def fetch(symbol):
             try:
-                df = self.get_crypto_data(symbol, period)
-                if df is not None:
-                    print(f"Dados obtidos para {symbol}: {len(df)} linhas")
-                    self.data[symbol] = df
-                else:
-                    print(f"Nenhum dado obtido para {symbol}")
+                return self.get_crypto_data(symbol, period)
             except Exception as e:
                 print(f"Erro ao buscar dados para {symbol}: {str(e)}")
-        self.calculate_indicators()
+                return None
+        
+        workers = min(MAX_FETCH_WORKERS, len(symbols))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(symbols, executor.map(fetch, symbols)))
+    
+    def _store_results(self, results):
+        """Guarda os DataFrames obtidos pela ordem original dos símbolos"""
+        for symbol in self.symbols:
+            df = results.get(symbol)
+            if df is not None:
+                if self.dtype is not None:
+                    columns = [col for col in PRICE_COLUMNS if col in df.columns]
+                    df[columns] = df[columns].astype(self.dtype)
+                print(f"Dados obtidos para {symbol}: {len(df)} linhas")
+                self.data[symbol] = df
+            else:
+                print(f"Nenhum dado obtido para {symbol}")
     
     def get_crypto_data(self, symbol, period='1d'):
         try:
-            if not '-USD' in symbol and not symbol.endswith('USD'):
-                ticker_symbol = f"{symbol}-USD"
-            else:
-                ticker_symbol = symbol
-                
-            ticker = yf.Ticker(ticker_symbol)
+            ticker_symbol = get_ticker_symbol(symbol)
             interval = '1m' if period == '1d' else '1d'
             
-            df = ticker.history(
-                period=period,
-                interval=interval
-            )
+            df = get_history(ticker_symbol, period, interval)
             
             if df.empty:
                 print(f"Nenhum dado encontrado para {symbol}")
@@ -58,37 +205,171 @@ class CryptoAnalyzer:
             if df is None or df.empty:
                 continue
             
-            # Bandas de Bollinger (20 períodos, 2 desvios padrão)
-            df['MA20'] = df['Close'].rolling(window=20).mean()
-            std = df['Close'].rolling(window=20).std()
-            df['BB_upper'] = df['MA20'] + (std * 2)
-            df['BB_lower'] = df['MA20'] - (std * 2)
+            # Os kernels recebem arrays contíguos em float64, convertidos uma única vez
+            close = np.ascontiguousarray(df['Close'].to_numpy(), dtype=np.float64)
+            volume = np.ascontiguousarray(df['Volume'].to_numpy(), dtype=np.float64)
             
-            # MACD (12, 26, 9)
-            exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-            exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-            df['MACD'] = exp1 - exp2
-            df['Signal_Line'] = df['MACD'].ewm(span=9, adjust=False).mean()
-            df['MACD_histogram'] = df['MACD'] - df['Signal_Line']
+            backend = self.backend
+            if backend == 'talib' and (np.isnan(close).any() or np.isnan(volume).any()):
+                # O TA-Lib propaga um único NaN até ao fim da série; os outros saltam as falhas
+                backend = 'numba' if NUMBA_AVAILABLE else 'pandas'
             
-            # RSI (14 períodos)
-            delta = df['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            df['RSI'] = 100 - (100 / (1 + rs))
+            if backend == 'numba':
+                indicators = self._calculate_indicators_numba(close, volume)
+            elif backend == 'talib':
+                indicators = self._calculate_indicators_talib(close, volume)
+            else:
+                indicators = self._calculate_indicators_pandas(close, volume)
             
+            for column, values in indicators.items():
+                df[column] = values
+    
+    def _calculate_indicators_pandas(self, close, volume):
+        """Calcula os indicadores com numpy (somas acumuladas e EMA vetorizada)"""
+        # Bandas de Bollinger (20 períodos, 2 desvios padrão)
+        ma20 = rolling_mean(close, 20)
+        std = rolling_mean_std(close, 20)[1]
+        
+        # MACD (12, 26, 9)
+        macd = ewm(close, 12) - ewm(close, 26)
+        signal_line = ewm(macd, 9)
+        
+        # RSI (14 períodos) com somas móveis de ganhos e perdas
+        delta = np.diff(close, prepend=np.nan)
+        avg_gain = rolling_mean(np.where(delta > 0, delta, 0.0), 14)
+        avg_loss = rolling_mean(np.where(delta < 0, -delta, 0.0), 14)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+        
+        return {
+            'MA20': ma20,
+            'BB_upper': ma20 + (std * 2),
+            'BB_lower': ma20 - (std * 2),
+            'MACD': macd,
+            'Signal_Line': signal_line,
+            'MACD_histogram': macd - signal_line,
+            'RSI': rsi,
             # Volume Médio Móvel (20 períodos)
-            df['Volume_MA20'] = df['Volume'].rolling(window=20).mean()
-            
-            self.data[symbol] = df
+            'Volume_MA20': rolling_mean(volume, 20),
+        }
+    
+    def _calculate_indicators_numba(self, close, volume):
+        """Calcula os indicadores com os kernels compilados pelo Numba"""
+        (ma20, bb_upper, bb_lower, macd, signal_line,
+         macd_histogram, rsi, volume_ma20) = compute_indicators(close, volume)
+        
+        return {
+            'MA20': ma20,
+            'BB_upper': bb_upper,
+            'BB_lower': bb_lower,
+            'MACD': macd,
+            'Signal_Line': signal_line,
+            'MACD_histogram': macd_histogram,
+            'RSI': rsi,
+            'Volume_MA20': volume_ma20,
+        }
+    
+    def _calculate_indicators_talib(self, close, volume):
+        """Calcula os indicadores com as implementações em C do TA-Lib
+        
+        O TA-Lib inicializa as EMA com uma média simples, pelo que os primeiros
+        valores do MACD diferem ligeiramente da versão pandas.
+        """
+        # Bandas de Bollinger (desvio padrão amostral, como no pandas)
+        ma20 = talib.SMA(close, timeperiod=20)
+        std = talib.STDDEV(close, timeperiod=20, nbdev=1) * np.sqrt(20 / 19)
+        
+        # MACD (12, 26, 9)
+        macd, signal_line, macd_histogram = talib.MACD(
+            close, fastperiod=12, slowperiod=26, signalperiod=9
+        )
+        
+        # RSI (14 períodos) com médias simples de ganhos e perdas
+        delta = np.diff(close, prepend=np.nan)
+        gain = talib.SMA(np.where(delta > 0, delta, 0.0), timeperiod=14)
+        loss = talib.SMA(np.where(delta < 0, -delta, 0.0), timeperiod=14)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + gain / loss))
+        
+        return {
+            'MA20': ma20,
+            'BB_upper': ma20 + (std * 2),
+            'BB_lower': ma20 - (std * 2),
+            'MACD': macd,
+            'Signal_Line': signal_line,
+            'MACD_histogram': macd_histogram,
+            'RSI': rsi,
+            # Volume Médio Móvel (20 períodos)
+            'Volume_MA20': talib.SMA(volume, timeperiod=20),
+        }
+    
+    def _forecast_key(self, symbol, days):
+        """Chave do cache de previsões: o modelo é treinado no máximo uma vez por dia"""
+        return (symbol, days, self.forecaster, datetime.utcnow().date())
+    
+    def compute_forecasts(self, symbols=None, days=30):
+        """Treina (ou reutiliza do cache diário) as previsões dos símbolos indicados"""
+        symbols = symbols if symbols is not None else self.symbols
+        pending = {}
+        for symbol in symbols:
+            key = self._forecast_key(symbol, days)
+            if key in _FORECAST_CACHE:
+                self.predictions[symbol] = _FORECAST_CACHE[key]
+                continue
+            prepared = self._prepare_forecast_data(symbol)
+            if prepared is not None:
+                pending[symbol] = prepared
+        
+        if len(pending) < 2:
+            for symbol, (historical_data, prophet_df) in pending.items():
+                self._run_forecast(symbol, days, historical_data, prophet_df)
+            return
+        
+        # O treino do Prophet é CPU-bound (Stan), por isso usa um processo por símbolo
+        workers = min(len(pending), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                symbol: executor.submit(_fit_one, self.forecaster, prophet_df, days)
+                for symbol, (historical_data, prophet_df) in pending.items()
+            }
+            for symbol, future in futures.items():
+                try:
+                    model, forecast = future.result()
+                except Exception as e:
+                    print(f"Erro na previsão para {symbol}: {str(e)}")
+                    continue
+                self._store_forecast(symbol, days, model, forecast, pending[symbol][0])
+    
+    def get_cached_forecast(self, symbol, days=30):
+        """Devolve a previsão já calculada para o símbolo, sem treinar o modelo"""
+        if symbol not in self.predictions:
+            key = self._forecast_key(symbol, days)
+            if key in _FORECAST_CACHE:
+                self.predictions[symbol] = _FORECAST_CACHE[key]
+        prediction = self.predictions.get(symbol)
+        return prediction['forecast'] if prediction else None
     
     def predict_price(self, symbol, days=30):
         """Faz previsão de preço para os próximos dias"""
+        key = self._forecast_key(symbol, days)
+        if key in _FORECAST_CACHE:
+            self.predictions[symbol] = _FORECAST_CACHE[key]
+            return _FORECAST_CACHE[key]['forecast']
+        
+        prepared = self._prepare_forecast_data(symbol)
+        if prepared is None:
+            return None
+        return self._run_forecast(symbol, days, *prepared)
+    
+    def _prepare_forecast_data(self, symbol):
+        """Obtém o histórico diário e o DataFrame no formato do Prophet (ou None)"""
+        key = (symbol, datetime.utcnow().date())
+        if key in _PROPHET_DATA_CACHE:
+            return _PROPHET_DATA_CACHE[key]
+        
         try:
             # Buscar dados históricos de 2 anos para ter mais dados
-            ticker = yf.Ticker(f"{symbol}-USD" if not '-USD' in symbol else symbol)
-            historical_data = ticker.history(period='2y', interval='1d')
+            historical_data = get_closed_history(get_ticker_symbol(symbol), FORECAST_HISTORY_DAYS)
             
             if historical_data.empty:
                 print(f"Sem dados históricos para {symbol}")
@@ -115,48 +396,43 @@ class CryptoAnalyzer:
             print(f"Linhas: {len(prophet_df)}")
             print(f"Intervalo: {prophet_df['ds'].min()} até {prophet_df['ds'].max()}")
             
-            # Configurar o modelo
-            model = Prophet(
-                daily_seasonality=False,
-                weekly_seasonality=True,
-                yearly_seasonality=True,
-                changepoint_prior_scale=0.01,
-                interval_width=0.95,
-                changepoint_range=0.9,
-                seasonality_mode='multiplicative'
-            )
-            
-            # Adicionar sazonalidades personalizadas
-            model.add_seasonality(
-                name='monthly',
-                period=30.5,
-                fourier_order=5
-            )
-            
-            # Treinar modelo
-            model.fit(prophet_df)
-            
-            # Criar datas futuras para previsão
-            future_dates = model.make_future_dataframe(periods=days, freq='D')
-            
-            # Fazer previsão
-            forecast = model.predict(future_dates)
-            
-            # Guardar previsão
-            self.predictions[symbol] = {
-                'forecast': forecast,
-                'model': model,
-                'historical_data': historical_data
-            }
-            
-            print(f"Previsão concluída para {symbol}")
-            return forecast
+            # Descartar dados de dias anteriores
+            for old_key in [k for k in _PROPHET_DATA_CACHE if k[-1] != key[-1]]:
+                del _PROPHET_DATA_CACHE[old_key]
+            _PROPHET_DATA_CACHE[key] = (historical_data, prophet_df)
+            return historical_data, prophet_df
             
         except Exception as e:
             print(f"Erro na previsão para {symbol}: {str(e)}")
             return None
     
-    def get_figure(self, period='1y'):
+    def _run_forecast(self, symbol, days, historical_data, prophet_df):
+        """Treina o modelo no processo atual e guarda a previsão"""
+        try:
+            model, forecast = _fit_one(self.forecaster, prophet_df, days)
+        except Exception as e:
+            print(f"Erro na previsão para {symbol}: {str(e)}")
+            return None
+        self._store_forecast(symbol, days, model, forecast, historical_data)
+        return forecast
+    
+    def _store_forecast(self, symbol, days, model, forecast, historical_data):
+        """Guarda a previsão na instância e no cache diário"""
+        key = self._forecast_key(symbol, days)
+        self.predictions[symbol] = {
+            'forecast': forecast,
+            'model': model,
+            'historical_data': historical_data
+        }
+        # Descartar previsões de dias anteriores
+        for old_key in [k for k in _FORECAST_CACHE if k[-1] != key[-1]]:
+            del _FORECAST_CACHE[old_key]
+        _FORECAST_CACHE[key] = self.predictions[symbol]
+        
+        print(f"Previsão concluída para {symbol}")
+    
+    def get_figure(self, period='1y', symbols=None):
+        """Constrói o gráfico para os símbolos indicados (por omissão, todos os carregados)"""
         if not self.data:
             return go.Figure()
         
@@ -190,14 +466,15 @@ class CryptoAnalyzer:
             subplot_titles=('Preço e Bandas de Bollinger', 'MACD', 'RSI', 'Volume', 'Previsão')
         )
 
-        # Definir cores diferentes para cada criptomoeda
-        colors = ['#00c853', '#2196f3', '#ff9800', '#e91e63', '#9c27b0', '#00bcd4']
         
-        for idx, symbol in enumerate(self.data):
-            color = colors[idx % len(colors)]  # Cor única para cada criptomoeda
-            df = self.data[symbol]
+        for idx, symbol in enumerate(symbols if symbols is not None else list(self.data)):
+            color = COLORS[idx % len(COLORS)]  # Cor única para cada criptomoeda
+            fill_color = COLOR_RGBA[idx % len(COLORS)]
+            df = self.data.get(symbol)
             if df is None or df.empty:
                 continue
+            # Janelas longas são agregadas antes de serem enviadas ao browser
+            df = downsample_ohlc(df, MAX_CHART_POINTS)
 
             # Customizar o formato do hover para o candlestick
             fig.add_trace(
@@ -209,14 +486,8 @@ class CryptoAnalyzer:
                     close=df['Close'],
                     name=f"Preço ({symbol})",
                     showlegend=True,
-                    text=[
-                        f"Data: {x}<br>" +
-                        f"Abertura: €{o:.8f}<br>" +
-                        f"Máxima: €{h:.8f}<br>" +
-                        f"Mínima: €{l:.8f}<br>" +
-                        f"Fechamento: €{c:.8f}"
-                        for x, o, h, l, c in zip(df.index, df['Open'], df['High'], df['Low'], df['Close'])
-                    ],
+                    # Formatado no browser, sem gerar um texto por vela
+                    yhoverformat='.8f',
                     hoverlabel=dict(
                         bgcolor="rgba(0,0,0,0.8)",
                         font_size=12,
@@ -228,75 +499,72 @@ class CryptoAnalyzer:
             
             # Customizar hover para MA20 e Bandas de Bollinger
             fig.add_trace(
-                go.Scatter(
+                go.Scattergl(
                     x=df.index, 
                     y=df['MA20'],
                     name=f'MA20 ({symbol})',
                     line=dict(color=color, width=1, dash='dot'),
                     opacity=0.7,
-                    text=[f"MA20: €{y:.8f}" for y in df['MA20']],
-                    hoverinfo='text+x'
+                    hovertemplate='MA20: €%{y:.8f}<extra></extra>'
                 ), row=1, col=1
             )
             
             fig.add_trace(
-                go.Scatter(
+                go.Scattergl(
                     x=df.index, 
                     y=df['BB_upper'],
                     name=f'BB Superior ({symbol})',
                     line=dict(color=color, width=1, dash='dash'),
                     opacity=0.3,
-                    text=[f"BB Superior: €{y:.8f}" for y in df['BB_upper']],
-                    hoverinfo='text+x'
+                    hovertemplate='BB Superior: €%{y:.8f}<extra></extra>'
                 ), row=1, col=1
             )
             
             fig.add_trace(
-                go.Scatter(
+                go.Scattergl(
                     x=df.index, 
                     y=df['BB_lower'],
                     name=f'BB Inferior ({symbol})',
                     line=dict(color=color, width=1, dash='dash'),
                     opacity=0.3,
                     fill='tonexty',
-                    text=[f"BB Inferior: €{y:.8f}" for y in df['BB_lower']],
-                    hoverinfo='text+x'
+                    hovertemplate='BB Inferior: €%{y:.8f}<extra></extra>'
                 ), row=1, col=1
             )
 
             # Customizar hover para MACD
             fig.add_trace(
-                go.Scatter(
+                go.Scattergl(
                     x=df.index, 
                     y=df['MACD'],
                     name=f'MACD ({symbol})',
+                    mode='lines',
                     line=dict(color=color, width=1),
-                    text=[f"MACD: {y:.8f}" for y in df['MACD']],
-                    hoverinfo='text+x'
+                    hovertemplate='MACD: %{y:.8f}<extra></extra>'
                 ), row=2, col=1
             )
             
             fig.add_trace(
-                go.Scatter(
+                go.Scattergl(
                     x=df.index, 
                     y=df['Signal_Line'],
                     name=f'Sinal MACD ({symbol})',
+                    mode='lines',
                     line=dict(color=color, width=1, dash='dot'),
                     opacity=0.7,
-                    text=[f"Sinal: {y:.8f}" for y in df['Signal_Line']],
-                    hoverinfo='text+x'
+                    hovertemplate='Sinal: %{y:.8f}<extra></extra>'
                 ), row=2, col=1
             )
 
             # Customizar hover para RSI
             fig.add_trace(
-                go.Scatter(
+                go.Scattergl(
                     x=df.index, 
                     y=df['RSI'],
                     name=f'RSI ({symbol})',
+                    mode='lines',
                     line=dict(color=color, width=1),
-                    text=[f"RSI: {y:.1f}" for y in df['RSI']],
-                    hoverinfo='text+x'
+                    hovertemplate='RSI: %{y:.1f}<extra></extra>'
                 ), row=3, col=1
             )
 
@@ -308,14 +576,14 @@ class CryptoAnalyzer:
                     name=f'Volume ({symbol})',
                     marker_color=color,
                     opacity=0.7,
-                    text=[f"Volume: {y:,.0f}" for y in df['Volume']],
-                    hoverinfo='text+x'
+                    hovertemplate='Volume: %{y:,.0f}<extra></extra>'
                 ), row=4, col=1
             )
             
             # Customizar hover para Previsão
-            forecast = self.predict_price(symbol)
-            if forecast is not None and symbol in self.predictions:
+            # A previsão é calculada à parte (compute_forecasts); aqui só se usa a existente
+            forecast = self.get_cached_forecast(symbol)
+            if forecast is not None:
                 fig.add_trace(
                     go.Scatter(
                         x=forecast['ds'], 
@@ -323,8 +591,7 @@ class CryptoAnalyzer:
                         name=f'Previsão ({symbol})',
                         line=dict(color=color, dash='dash'),
                         mode='lines',
-                        text=[f"Previsão: €{y:.8f}" for y in forecast['yhat']],
-                        hoverinfo='text+x'
+                        hovertemplate='Previsão: €%{y:.8f}<extra></extra>'
                     ), row=5, col=1
                 )
                 
@@ -347,10 +614,9 @@ class CryptoAnalyzer:
                         fill='tonexty',
                         mode='lines',
                         line_color='rgba(0,0,0,0)',
-                        fillcolor=f'rgba({",".join(map(str, hex_to_rgb(color)))},0.2)',
+                        fillcolor=fill_color,
                         name=f'IC ({symbol})',
-                        text=[f"Intervalo: €{y:.8f}" for y in forecast['yhat_lower']],
-                        hoverinfo='text+x'
+                        hovertemplate='Intervalo: €%{y:.8f}<extra></extra>'
                     ), row=5, col=1
                 )
 
@@ -399,4 +665,200 @@ class CryptoAnalyzer:
 def hex_to_rgb(hex_color):
     """Converte cor hexadecimal para RGB"""
     hex_color = hex_color.lstrip('#')
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
\ No newline at end of file
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+# Cores de preenchimento do intervalo de previsão, calculadas uma só vez
+COLOR_RGBA = [f'rgba({r},{g},{b},0.2)' for r, g, b in map(hex_to_rgb, COLORS)]
+
+def _fit_one(forecaster, prophet_df, days):
+    """Treina um modelo e devolve (modelo, previsão); corre também num processo filho"""
+    if forecaster == 'neuralprophet':
+        return fit_neuralprophet(prophet_df, days)
+    return fit_prophet(prophet_df, days)
+
+def fit_prophet(prophet_df, days):
+    """Treina o Prophet e devolve o modelo e a previsão"""
+    # Com mais de um ano de histórico, um ponto em cada dois chega para a tendência
+    if len(prophet_df) > PROPHET_SUBSAMPLE_MIN_ROWS:
+        prophet_df = prophet_df.iloc[::2]
+    
+    # Previsões curtas só precisam da sazonalidade semanal
+    long_horizon = days > SHORT_FORECAST_DAYS
+    
+    # Configurar o modelo
+    model = Prophet(
+        daily_seasonality=False,
+        weekly_seasonality=True,
+        yearly_seasonality=long_horizon,
+        changepoint_prior_scale=0.01,
+        interval_width=0.95,
+        changepoint_range=0.9,
+        seasonality_mode='multiplicative',
+        uncertainty_samples=PROPHET_UNCERTAINTY_SAMPLES
+    )
+    
+    # Adicionar sazonalidades personalizadas
+    if long_horizon:
+        model.add_seasonality(
+            name='monthly',
+            period=30.5,
+            fourier_order=5
+        )
+    
+    # Treinar modelo
+    model.fit(prophet_df)
+    
+    # Criar datas futuras para previsão
+    future_dates = model.make_future_dataframe(periods=days, freq='D')
+    
+    # Fazer previsão
+    forecast = model.predict(future_dates)
+    
+    return model, forecast
+
+def fit_neuralprophet(prophet_df, days):
+    """Treina o NeuralProphet (mais rápido) com as colunas no formato do Prophet"""
+    from neuralprophet import NeuralProphet
+    
+    # Sem subamostragem: o NeuralProphet exige uma série diária regular
+    long_horizon = days > SHORT_FORECAST_DAYS
+    model = NeuralProphet(
+        daily_seasonality=False,
+        weekly_seasonality=True,
+        yearly_seasonality=long_horizon,
+        seasonality_mode='multiplicative',
+        quantiles=[0.025, 0.975],  # intervalo de 95%, como no Prophet
+        epochs=20
+    )
+    if long_horizon:
+        model.add_seasonality(name='monthly', period=30.5, fourier_order=5)
+    model.fit(prophet_df, freq='D')
+    
+    future_dates = model.make_future_dataframe(prophet_df, periods=days, n_historic_predictions=True)
+    forecast = model.predict(future_dates).rename(columns={
+        'yhat1': 'yhat',
+        'yhat1 2.5%': 'yhat_lower',
+        'yhat1 97.5%': 'yhat_upper'
+    })
+    
+    return model, forecast
+
+def downsample_ohlc(df, max_points):
+    """Agrega velas consecutivas (primeira/máxima/mínima/última) até caberem em max_points"""
+    n = len(df)
+    if n <= max_points:
+        return df
+    
+    bucket = -(-n // max_points)  # divisão arredondada para cima
+    groups = np.arange(n) // bucket
+    # Indicadores e restantes colunas ficam com o último valor de cada grupo
+    agg = {col: 'last' for col in df.columns}
+    agg.update({'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'})
+    agg = {col: how for col, how in agg.items() if col in df.columns}
+    
+    result = df.groupby(groups).agg(agg)
+    result.index = df.index[::bucket]
+    return result
+
+def get_ticker_symbol(symbol):
+    """Converte o símbolo da moeda no ticker do Yahoo Finance (par em USD)"""
+    ticker_symbol = TICKER_SYMBOLS.get(symbol)
+    if ticker_symbol is None:
+        if not '-USD' in symbol and not symbol.endswith('USD'):
+            ticker_symbol = f"{symbol}-USD"
+        else:
+            ticker_symbol = symbol
+        TICKER_SYMBOLS[symbol] = ticker_symbol
+    return ticker_symbol
+
+def get_ticker(ticker_symbol):
+    """Devolve o yf.Ticker do símbolo, criado uma só vez e partilhado entre callbacks"""
+    ticker = _TICKERS.get(ticker_symbol)
+    if ticker is None:
+        ticker = _TICKERS.setdefault(ticker_symbol, yf.Ticker(ticker_symbol, session=YF_SESSION))
+    return ticker
+
+@lru_cache(maxsize=128)
+def _get_history(ticker_symbol, period, interval, minute_bucket):
+    """Histórico do yfinance memorizado durante o minuto indicado por minute_bucket"""
+    return get_ticker(ticker_symbol).history(period=period, interval=interval)
+
+def get_history(ticker_symbol, period, interval):
+    """Devolve uma cópia do histórico memorizado (os indicadores alteram o DataFrame)"""
+    return _get_history(ticker_symbol, period, interval, int(time.time() // 60)).copy()
+
+def get_closed_history(ticker_symbol, days):
+    """Velas diárias dos últimos dias até ao início do dia (UTC), sem a vela em curso"""
+    # Datas fixas durante todo o dia: o pedido é o mesmo e pode ficar no cache da sessão
+    end = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return get_ticker(ticker_symbol).history(start=end - timedelta(days=days), end=end, interval='1d')
+
+def rolling_mean_std(x, window):
+    """Média e desvio padrão (ddof=1) móveis em O(n) a partir de somas acumuladas
+    
+    Os valores são centrados na média global antes de somar os quadrados, para
+    limitar o cancelamento numérico em moedas de preço elevado. Janelas com
+    valores em falta ficam a NaN, como no rolling do pandas.
+    """
+    n = x.size
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    if n < window:
+        return mean, std
+    
+    missing = np.isnan(x)
+    shift = x[~missing].mean() if not missing.all() else 0.0
+    centered = np.where(missing, 0.0, x - shift)
+    
+    sums = np.concatenate(([0.0], np.cumsum(centered)))
+    sums_sq = np.concatenate(([0.0], np.cumsum(centered * centered)))
+    counts = np.concatenate(([0], np.cumsum(missing)))
+    
+    window_sum = sums[window:] - sums[:-window]
+    window_sum_sq = sums_sq[window:] - sums_sq[:-window]
+    complete = (counts[window:] - counts[:-window]) == 0
+    
+    window_mean = window_sum / window
+    window_var = np.maximum((window_sum_sq - window_sum * window_mean) / (window - 1), 0.0)
+    mean[window - 1:] = np.where(complete, window_mean + shift, np.nan)
+    std[window - 1:] = np.where(complete, np.sqrt(window_var), np.nan)
+    return mean, std
+
+def rolling_mean(x, window):
+    """Média móvel por convolução com uma janela uniforme (NaN nas primeiras window-1 posições)"""
+    mean = np.full(x.size, np.nan)
+    if x.size >= window:
+        # Janelas com valores em falta ficam a NaN, como no rolling do pandas
+        mean[window - 1:] = np.convolve(x, np.full(window, 1.0 / window), mode='valid')
+    return mean
+
+# Tamanho máximo da série para a EMA por convolução com pesos geométricos (O(n²));
+# acima de ~512 pontos o ewm do pandas já é mais rápido
+EMA_WEIGHTS_MAX_LENGTH = 512
+
+@lru_cache(maxsize=8)
+def _ema_weights(span, n):
+    """Pesos geométricos a*(1-a)^k, k = 0..n-1, da EMA com o span indicado"""
+    alpha = 2 / (span + 1)
+    weights = alpha * (1 - alpha) ** np.arange(n)
+    weights.setflags(write=False)
+    return weights
+
+def ewm(x, span):
+    """Média exponencial equivalente a Series.ewm(span, adjust=False).mean()
+    
+    Usa o filtro IIR y[n] = a*x[n] + (1-a)*y[n-1] do scipy quando disponível.
+    Sem scipy, séries curtas usam a forma fechada y[t] = sum(a*(1-a)^k * x[t-k])
+    + (1-a)^(t+1) * x[0] via convolução com pesos pré-calculados. Com valores em
+    falta recorre ao pandas, que os salta.
+    """
+    n = x.size
+    if n == 0 or np.isnan(x).any():
+        return pd.Series(x).ewm(span=span, adjust=False).mean().to_numpy()
+    alpha = 2 / (span + 1)
+    if lfilter is not None:
+        return lfilter([alpha], [1, alpha - 1], x, zi=[x[0] * (1 - alpha)])[0]
+    if n <= EMA_WEIGHTS_MAX_LENGTH:
+        weights = _ema_weights(span, n)
+        return np.convolve(x, weights)[:n] + (1 - alpha) ** np.arange(1, n + 1) * x[0]
+    return pd.Series(x).ewm(span=span, adjust=False).mean().to_numpy()
@@ -3,9 +3,15 @@ from stock_analyzer import StockAnalyzer
 import dash
 from dash import html, dcc
 import sys
+import os
+import shutil
+from utils.cache import init_cache
 
 app = dash.Dash(__name__, use_pages=True)
 
+# Cache dos downloads e previsões (partilhado entre os workers do gunicorn)
+init_cache(app.server)
+
 app.layout = html.Div([
     html.Nav([
         html.Ul([
@@ -21,9 +27,41 @@ app.layout = html.Div([
     dash.page_container
 ])
 
+# Servidor WSGI usado pelo gunicorn (ver wsgi.py)
+server = app.server
+
+# Configuração do gunicorn: vários processos para que um callback lento
+# (ex.: o treino do Prophet) não bloqueie os restantes utilizadores
+GUNICORN_WORKERS = 4
+GUNICORN_THREADS = 4
+GUNICORN_TIMEOUT = 120
+# Mesmo endereço do servidor de desenvolvimento do Dash (e do app.py)
+HOST = '127.0.0.1'
+PORT = 8050
+
+def run_gunicorn():
+    """Substitui o processo atual pelo gunicorn a servir wsgi:server"""
+    gunicorn = shutil.which('gunicorn')
+    if gunicorn is None:
+        return False
+    os.execv(gunicorn, [
+        gunicorn,
+        f'--bind={HOST}:{PORT}',
+        f'--workers={GUNICORN_WORKERS}',
+        f'--threads={GUNICORN_THREADS}',
+        f'--timeout={GUNICORN_TIMEOUT}',
+        '--worker-class=gthread',
+        f'--chdir={os.path.dirname(os.path.abspath(__file__))}',
+        'wsgi:server'
+    ])
+
 def main():
     try:
-        app.run_server(debug=True)
+        # DEV=1 usa o servidor de desenvolvimento do Dash (recarregamento e debug)
+        if os.environ.get('DEV') or not run_gunicorn():
+            if not os.environ.get('DEV'):
+                print("gunicorn não está instalado, a usar o servidor de desenvolvimento")
+            app.run(host=HOST, port=PORT, debug=bool(os.environ.get('DEV')))
     except Exception as e:
         print(f"Erro inesperado: {str(e)}")
         sys.exit(1)
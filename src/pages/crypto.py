@@ -1,8 +1,11 @@
-from dash import html, dcc
+from dash import html, dcc, Patch
 from dash.dependencies import Input, Output, State
 import dash
-from crypto_analyzer import CryptoAnalyzer
+from crypto_analyzer import CryptoAnalyzer, MAX_CHART_POINTS, downsample_ohlc
 from dash.exceptions import PreventUpdate
+import plotly.graph_objects as go
+import pandas as pd
+import time
 
 # Lista atualizada com os valores reais do portfólio
 CRYPTO_COM_COINS = [
@@ -28,6 +31,32 @@ CRYPTO_COM_COINS = [
 for coin in CRYPTO_COM_COINS:
     coin['avg_price_eur'] = coin['invested_eur'] / coin['quantity']
 
+# Carteira em forma de tabela, para o resumo ser calculado de forma vetorizada
+PORTFOLIO_DF = pd.DataFrame({
+    'symbol': [coin['symbol'] for coin in CRYPTO_COM_COINS],
+    'label': [coin['label'] for coin in CRYPTO_COM_COINS],
+    'quantity': [coin['quantity'] for coin in CRYPTO_COM_COINS],
+    'avg_price': [coin['avg_price_eur'] for coin in CRYPTO_COM_COINS],
+})
+PORTFOLIO_DF['invested'] = PORTFOLIO_DF['quantity'] * PORTFOLIO_DF['avg_price']
+
+# Coluna do DataFrame mostrada por cada traço do gráfico (pelo prefixo do nome)
+LIVE_TRACE_COLUMNS = {
+    'MA20': 'MA20',
+    'BB Superior': 'BB_upper',
+    'BB Inferior': 'BB_lower',
+    'MACD': 'MACD',
+    'Sinal MACD': 'Signal_Line',
+    'RSI': 'RSI',
+    'Volume': 'Volume',
+}
+
+# Período pedido para os preços atuais da carteira (poucas velas diárias, sem indicadores)
+PORTFOLIO_PRICE_PERIOD = '5d'
+
+# Atributos do candlestick atualizados a cada tick
+CANDLE_COLUMNS = {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close'}
+
 dash.register_page(
     __name__,
     path='/',
@@ -37,37 +66,23 @@ dash.register_page(
 
 def create_portfolio_summary(analyzer):
     """Cria o resumo do portfólio com valores atuais"""
-    total_invested = 0
-    total_current = 0
-    portfolio_data = []
+    # Pegar último preço dos dados do analisador
+    price_map = {
+        symbol: df['Close'].iloc[-1]
+        for symbol, df in analyzer.data.items()
+        if not df.empty
+    }
+    portfolio = PORTFOLIO_DF.assign(current_price=PORTFOLIO_DF['symbol'].map(price_map))
+    portfolio = portfolio[portfolio['current_price'].notna()]
     
-    for coin in CRYPTO_COM_COINS:
-        symbol = coin['symbol']
-        quantity = coin['quantity']
-        avg_price = coin['avg_price_eur']
-        invested = quantity * avg_price
-        
-        # Pegar último preço dos dados do analisador
-        current_price = None
-        if symbol in analyzer.data and not analyzer.data[symbol].empty:
-            current_price = analyzer.data[symbol]['Close'].iloc[-1]
-            current_value = quantity * current_price
-            change_pct = ((current_price - avg_price) / avg_price) * 100
-            
-            total_invested += invested
-            total_current += current_value
-            
-            portfolio_data.append({
-                'symbol': symbol,
-                'label': coin['label'],
-                'quantity': quantity,
-                'avg_price': avg_price,
-                'current_price': current_price,
-                'invested': invested,
-                'current_value': current_value,
-                'change_pct': change_pct,
-                'profit_loss': current_value - invested
-            })
+    # Cálculo vetorizado para todas as moedas com dados
+    portfolio['current_value'] = portfolio['quantity'] * portfolio['current_price']
+    portfolio['change_pct'] = (portfolio['current_price'] - portfolio['avg_price']) / portfolio['avg_price'] * 100
+    portfolio['profit_loss'] = portfolio['current_value'] - portfolio['invested']
+    
+    total_invested = portfolio['invested'].sum()
+    total_current = portfolio['current_value'].sum()
+    portfolio_data = portfolio.to_dict('records')
     
     total_change_pct = ((total_current - total_invested) / total_invested * 100) if total_invested > 0 else 0
     
@@ -158,6 +173,20 @@ def layout():
             n_intervals=0
         ),
         
+        # Previsões recalculadas uma vez por dia (e ao mudar a seleção)
+        dcc.Interval(
+            id='forecast-interval',
+            interval=24*3600*1000,  # em milissegundos (24 horas)
+            n_intervals=0
+        ),
+        dcc.Store(id='forecast-store'),
+        
+        # Traços de cada moeda no gráfico, para as atualizações incrementais
+        dcc.Store(id='crypto-graph-meta'),
+        
+        # Moedas do último desenho completo; só depois dele é que as previsões são treinadas
+        dcc.Store(id='crypto-graph-drawn'),
+        
         html.Div([
             html.H1('Análise de Criptomoedas'),
             html.P('Acompanhamento em tempo real do mercado de criptomoedas')
@@ -206,15 +235,74 @@ def layout():
         ], className='container')
     ])
 
+def load_analyzer(selected_cryptos, selected_period):
+    """Busca as moedas selecionadas com o período do gráfico"""
+    analyzer = CryptoAnalyzer(selected_cryptos)
+    analyzer.fetch_data(period=selected_period)
+    return analyzer
+
+def load_portfolio():
+    """Busca só as últimas velas diárias de toda a carteira (para o preço atual)"""
+    analyzer = CryptoAnalyzer([coin['symbol'] for coin in CRYPTO_COM_COINS])
+    analyzer.fetch_data(period=PORTFOLIO_PRICE_PERIOD, indicators=False)
+    return analyzer
+
+def build_graph_meta(figure):
+    """Regista, por moeda, os traços atualizáveis e o último ponto desenhado"""
+    meta = {}
+    for idx, trace in enumerate(figure.data):
+        if not trace.name or ' (' not in trace.name or trace.x is None or len(trace.x) == 0:
+            continue
+        prefix, symbol = trace.name[:-1].split(' (', 1)
+        if trace.type == 'candlestick':
+            column = 'candle'
+        elif prefix in LIVE_TRACE_COLUMNS:
+            column = LIVE_TRACE_COLUMNS[prefix]
+        else:
+            continue  # a previsão só muda uma vez por dia
+        entry = meta.setdefault(symbol, {'traces': {}, 'last_x': str(pd.Timestamp(trace.x[-1])), 'n': len(trace.x)})
+        entry['traces'][str(idx)] = column
+    return meta
+
+def trace_values(df, column):
+    """Atributos (x, y ou OHLC) de um traço atualizável como listas simples"""
+    # Listas em vez de arrays numpy: o plotly 6 envia os arrays como {'dtype', 'bdata'},
+    # onde o Patch não consegue substituir nem acrescentar pontos
+    columns = CANDLE_COLUMNS if column == 'candle' else {'y': column}
+    values = {'x': [ts.isoformat() for ts in df.index]}
+    for attr, col in columns.items():
+        values[attr] = [to_json_value(value) for value in df[col].to_numpy()]
+    return values
+
+def use_plain_arrays(figure, analyzer, meta):
+    """Devolve a figura como dicionário, com listas simples nos traços atualizáveis, e acerta o meta"""
+    # No dicionário as listas não voltam a ser convertidas em arrays pela validação do plotly
+    figure = figure.to_dict()
+    for symbol, entry in meta.items():
+        df = downsample_ohlc(analyzer.data[symbol], MAX_CHART_POINTS)
+        for idx, column in entry['traces'].items():
+            figure['data'][int(idx)].update(trace_values(df, column))
+        # Último ponto tal como o update_latest_bar o compara
+        entry['last_x'] = str(df.index[-1])
+        entry['n'] = len(df)
+    return figure
+
+def to_json_value(value):
+    """Converte um valor numpy para JSON (NaN passa a None)"""
+    return None if pd.isna(value) else float(value)
+
 @dash.callback(
     [Output('crypto-graph', 'figure'),
      Output('crypto-portfolio-section', 'children'),
-     Output('loading-overlay', 'style')],
+     Output('loading-overlay', 'style'),
+     Output('crypto-graph-meta', 'data'),
+     Output('crypto-graph-drawn', 'data')],
     [Input('crypto-selector', 'value'),
      Input('period-selector-crypto', 'value'),
-     Input('interval-component', 'n_intervals')]
+     Input('forecast-store', 'data')]
 )
-def update_page(selected_cryptos, selected_period, n_intervals):
+def update_page(selected_cryptos, selected_period, forecast_data):
+    """Desenha o gráfico completo quando muda a seleção, o período ou as previsões"""
     if not selected_cryptos:
         raise PreventUpdate
         
@@ -222,19 +310,104 @@ def update_page(selected_cryptos, selected_period, n_intervals):
     loading_style = {'display': 'flex'}
     
     try:
-        # Buscar dados
-        analyzer = CryptoAnalyzer(selected_cryptos)
-        analyzer.fetch_data(period=selected_period)
-        
-        portfolio_analyzer = CryptoAnalyzer([coin['symbol'] for coin in CRYPTO_COM_COINS])
-        portfolio_analyzer.fetch_data(period='1d')
+        analyzer = load_analyzer(selected_cryptos, selected_period)
+        figure = analyzer.get_figure(symbols=selected_cryptos)
+        meta = build_graph_meta(figure)
+        figure = use_plain_arrays(figure, analyzer, meta)
         
         # Esconder loader
         loading_style = {'display': 'none'}
         
-        return analyzer.get_figure(), create_portfolio_summary(portfolio_analyzer), loading_style
+        return figure, create_portfolio_summary(load_portfolio()), loading_style, meta, selected_cryptos
     except Exception as e:
         print(f"Erro ao atualizar dados: {str(e)}")
         # Esconder loader em caso de erro
         loading_style = {'display': 'none'}
-        return go.Figure(), html.Div("Erro ao carregar dados"), loading_style
\ No newline at end of file
+        return go.Figure(), html.Div("Erro ao carregar dados"), loading_style, {}, dash.no_update
+
+@dash.callback(
+    [Output('crypto-graph', 'figure', allow_duplicate=True),
+     Output('crypto-portfolio-section', 'children', allow_duplicate=True),
+     Output('crypto-graph-meta', 'data', allow_duplicate=True)],
+    Input('interval-component', 'n_intervals'),
+    [State('crypto-selector', 'value'),
+     State('period-selector-crypto', 'value'),
+     State('crypto-graph-meta', 'data')],
+    prevent_initial_call=True
+)
+def update_latest_bar(n_intervals, selected_cryptos, selected_period, meta):
+    """A cada tick só atualiza (ou acrescenta) a última vela de cada traço"""
+    if not selected_cryptos or not meta:
+        raise PreventUpdate
+    
+    try:
+        analyzer = load_analyzer(selected_cryptos, selected_period)
+        portfolio = load_portfolio()
+    except Exception as e:
+        print(f"Erro ao atualizar dados: {str(e)}")
+        raise PreventUpdate
+    
+    patch = Patch()
+    for symbol, entry in meta.items():
+        df = analyzer.data.get(symbol)
+        if df is None or df.empty:
+            continue
+        # Os mesmos pontos do gráfico: nos agregados, a última vela é o último grupo
+        df = downsample_ohlc(df, MAX_CHART_POINTS)
+        last = df.iloc[-1]
+        last_x = str(df.index[-1])
+        n = len(df)
+        
+        if n == entry['n'] and last_x == entry['last_x']:
+            # Mesma vela (ou grupo): substituir o último ponto
+            action = 'assign'
+        elif n == entry['n'] + 1 and str(df.index[-2]) == entry['last_x']:
+            # Vela nova: acrescentar um ponto
+            action = 'append'
+        else:
+            # A janela deslizou ou os grupos mudaram: reenviar os traços desta moeda
+            action = 'replace'
+        
+        for idx, column in entry['traces'].items():
+            trace = patch['data'][int(idx)]
+            if action == 'replace':
+                for attr, values in trace_values(df, column).items():
+                    trace[attr] = values
+                continue
+            values = CANDLE_COLUMNS if column == 'candle' else {'y': column}
+            if action == 'append':
+                # A vela anterior fechou depois do último tick: gravar os valores finais
+                previous = df.iloc[-2]
+                trace['x'].append(df.index[-1].isoformat())
+                for attr, col in values.items():
+                    trace[attr][n - 2] = to_json_value(previous[col])
+                    trace[attr].append(to_json_value(last[col]))
+            else:
+                for attr, col in values.items():
+                    trace[attr][n - 1] = to_json_value(last[col])
+        
+        entry['last_x'] = last_x
+        entry['n'] = n
+    
+    return patch, create_portfolio_summary(portfolio), meta
+
+@dash.callback(
+    Output('forecast-store', 'data'),
+    [Input('crypto-graph-drawn', 'data'),
+     Input('forecast-interval', 'n_intervals')],
+    State('forecast-store', 'data')
+)
+def update_forecasts(selected_cryptos, n_intervals, forecast_data):
+    """Treina as previsões depois de o gráfico ser desenhado (com as previsões já em cache)"""
+    # Não depende do seletor: o update_page redesenha logo, sem esperar pelo treino
+    if not selected_cryptos:
+        raise PreventUpdate
+    # Redesenho causado pelas próprias previsões: já não há nada para treinar
+    if (dash.ctx.triggered_id == 'crypto-graph-drawn' and forecast_data
+            and set(selected_cryptos) <= set(forecast_data['symbols'])):
+        raise PreventUpdate
+    
+    analyzer = CryptoAnalyzer(selected_cryptos)
+    analyzer.compute_forecasts()
+    # Alterar o Store faz o gráfico ser redesenhado com as novas previsões
+    return {'symbols': selected_cryptos, 'updated_at': time.time()}
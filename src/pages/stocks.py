@@ -1,8 +1,29 @@
 from dash import html, dcc
-from dash.dependencies import Input, Output, State
+from dash.dependencies import Input, Output, State, ClientsideFunction
 import dash
 from stock_analyzer import StockAnalyzer
 from dash.exceptions import PreventUpdate
+import plotly.graph_objects as go
+import plotly.io as pio
+import json
+import time
+from threading import Lock
+from utils.cache import cache
+
+try:
+    from plotly_resampler import FigureResampler
+    RESAMPLER_AVAILABLE = True
+except ImportError:
+    RESAMPLER_AVAILABLE = False
+
+# O orjson serializa os arrays numpy diretamente em C, muito mais rápido que o json
+try:
+    import orjson
+    JSON_ENGINE = 'orjson'
+    json_loads = orjson.loads
+except ImportError:
+    JSON_ENGINE = 'json'
+    json_loads = json.loads
 
 # Lista personalizada de ações e ETFs com quantidade e preço médio de compra
 MY_STOCKS = [
@@ -16,6 +37,21 @@ MY_STOCKS = [
     {'symbol': 'VLO', 'label': 'Valero Energy', 'quantity': 0.2330904, 'avg_price': 128.75},
 ]
 
+# Analisador da carteira partilhado entre callbacks (ver update_prices)
+PORTFOLIO = StockAnalyzer([stock['symbol'] for stock in MY_STOCKS])
+
+# Pontos por traço enviados ao browser quando o plotly-resampler está instalado
+RESAMPLER_SAMPLES = 1000
+# Figuras com resampler deste processo por (ativos, período, previsões): (figura, timestamp),
+# usadas nos eventos de zoom; cada worker do gunicorn reconstrói as que lhe faltam
+_resampled_figures = {}
+RESAMPLED_FIGURES_MAXSIZE = 16
+# Os pedidos podem chegar em threads diferentes do mesmo worker
+_resampled_figures_lock = Lock()
+
+# Validade (segundos) da figura memorizada e das figuras com resampler
+FIGURE_TTL = 60
+
 dash.register_page(
     __name__,
     path='/stocks',
@@ -23,108 +59,56 @@ dash.register_page(
     name='Ações e ETFs'
 )
 
-def create_portfolio_summary(analyzer):
-    """Cria o resumo do portfólio com valores atuais"""
-    total_invested = 0
-    total_current = 0
-    portfolio_data = []
-    
-    for stock in MY_STOCKS:
-        symbol = stock['symbol']
-        quantity = stock['quantity']
-        avg_price = stock['avg_price']
-        invested = quantity * avg_price
-        
-        # Pegar último preço dos dados do analisador
-        current_price = None
-        if symbol in analyzer.data and not analyzer.data[symbol].empty:
-            current_price = analyzer.data[symbol]['Close'].iloc[-1]
-            current_value = quantity * current_price
-            change_pct = ((current_price - avg_price) / avg_price) * 100
-            
-            total_invested += invested
-            total_current += current_value
-            
-            portfolio_data.append({
-                'symbol': symbol,
-                'label': stock['label'],
-                'quantity': quantity,
-                'avg_price': avg_price,
-                'current_price': current_price,
-                'invested': invested,
-                'current_value': current_value,
-                'change_pct': change_pct,
-                'profit_loss': current_value - invested
-            })
-    
-    total_change_pct = ((total_current - total_invested) / total_invested * 100) if total_invested > 0 else 0
-    
-    return html.Div([
-        # Resumo geral
-        html.Div([
-            html.Div([
-                html.H3('Total Investido'),
-                html.Div(f'€{total_invested:,.2f}', className='summary-value')
-            ], className='summary-card'),
-            
-            html.Div([
-                html.H3('Valor Atual'),
-                html.Div(f'€{total_current:,.2f}', className='summary-value')
-            ], className='summary-card'),
-            
-            html.Div([
-                html.H3('Lucro/Prejuízo'),
-                html.Div(
-                    f'€{total_current - total_invested:+,.2f}',
-                    className=f'summary-value {"trend-up" if total_current >= total_invested else "trend-down"}'
-                )
-            ], className='summary-card'),
-            
-            html.Div([
-                html.H3('Retorno'),
-                html.Div(
-                    f'{total_change_pct:+.2f}%',
-                    className=f'summary-value {"trend-up" if total_change_pct >= 0 else "trend-down"}'
-                )
-            ], className='summary-card'),
-        ], className='portfolio-overview'),
-        
-        # Tabela detalhada
-        html.Div([
-            html.Table([
-                html.Thead([
-                    html.Tr([
-                        html.Th('Ativo'),
-                        html.Th('Quantidade'),
-                        html.Th('Preço Médio'),
-                        html.Th('Preço Atual'),
-                        html.Th('Total Investido'),
-                        html.Th('Valor Atual'),
-                        html.Th('Retorno'),
-                        html.Th('Lucro/Prejuízo')
-                    ])
-                ]),
-                html.Tbody([
-                    html.Tr([
-                        html.Td(f"{item['label']} ({item['symbol']})"),
-                        html.Td(f"{item['quantity']:,.0f}"),
-                        html.Td(f"€{item['avg_price']:,.2f}"),
-                        html.Td(f"€{item['current_price']:,.2f}"),
-                        html.Td(f"€{item['invested']:,.2f}"),
-                        html.Td(f"€{item['current_value']:,.2f}"),
-                        html.Td(
-                            f"{item['change_pct']:+.2f}%",
-                            className='trend-up' if item['change_pct'] >= 0 else 'trend-down'
-                        ),
-                        html.Td(
-                            f"€{item['profit_loss']:+,.2f}",
-                            className='trend-up' if item['profit_loss'] >= 0 else 'trend-down'
-                        )
-                    ]) for item in portfolio_data
-                ])
-            ], className='portfolio-table')
-        ], className='portfolio-table-container')
-    ])
+def build_figure(symbols, period):
+    """Busca os dados dos ativos e constrói a figura completa"""
+    analyzer = StockAnalyzer(list(symbols))
+    analyzer.fetch_data(period=period)
+    return analyzer.get_figure()
+
+def get_resampled_figure(symbols, period, forecast_stamp=None, rebuild=False):
+    """Figura com resampler dos ativos, reconstruída se faltar neste processo ou estiver velha"""
+    key = (symbols, period, forecast_stamp)
+    with _resampled_figures_lock:
+        cached = _resampled_figures.pop(key, None)
+    if rebuild or cached is None or time.time() - cached[1] > FIGURE_TTL:
+        # Só as amostras visíveis seguem para o browser; o zoom pede mais ao servidor.
+        # Sem prefixo/sufixo, a legenda fica igual à da figura original
+        figure = FigureResampler(
+            build_figure(symbols, period),
+            default_n_shown_samples=RESAMPLER_SAMPLES,
+            resampled_trace_prefix_suffix=('', ''),
+            show_mean_aggregation_size=False
+        )
+        cached = (figure, time.time())
+    with _resampled_figures_lock:
+        _resampled_figures[key] = cached
+        # Descartar as figuras usadas há mais tempo
+        while len(_resampled_figures) > RESAMPLED_FIGURES_MAXSIZE:
+            _resampled_figures.pop(next(iter(_resampled_figures)), None)
+    return cached[0]
+
+def is_zoomed(relayout_data):
+    """Indica se o último relayout do gráfico definiu uma janela no eixo X"""
+    return bool(relayout_data) and any(
+        key.startswith('xaxis') and '.range' in key for key in relayout_data
+    )
+
+@cache.memoize(timeout=FIGURE_TTL)
+def figure_json(symbols, period, forecast_stamp=None):
+    """Constrói a figura dos ativos e devolve-a em JSON, para o cache guardar só o texto
+
+    forecast_stamp só entra na chave do cache: muda quando há previsões novas.
+    """
+    if RESAMPLER_AVAILABLE:
+        # Cache falhado: os dados podem ter mudado, por isso a figura é sempre refeita
+        figure = get_resampled_figure(symbols, period, forecast_stamp, rebuild=True)
+    else:
+        figure = build_figure(symbols, period)
+    return pio.to_json(figure, engine=JSON_ENGINE)
+
+def get_last_prices(analyzer):
+    """Último fecho (em EUR) de cada ativo com dados"""
+    return dict(analyzer.last_prices)
 
 def layout():
     return html.Div([
@@ -146,6 +130,20 @@ def layout():
             n_intervals=0
         ),
         
+        # Previsões recalculadas de hora a hora (validade do cache do Prophet)
+        dcc.Interval(
+            id='forecast-interval-stocks',
+            interval=3600*1000,  # em milissegundos (1 hora)
+            n_intervals=0
+        ),
+        dcc.Store(id='forecast-store-stocks'),
+        # Ativos do último desenho completo; só depois dele é que as previsões são treinadas
+        dcc.Store(id='stock-graph-drawn'),
+        
+        # Últimos preços da carteira; o resumo é desenhado no browser (assets/portfolio.js)
+        dcc.Store(id='prices-store'),
+        dcc.Store(id='portfolio-holdings', data=MY_STOCKS),
+        
         html.Div([
             html.H1('Análise de Ações e ETFs'),
             html.P('Acompanhamento em tempo real da sua carteira de ações e ETFs')
@@ -196,13 +194,15 @@ def layout():
 
 @dash.callback(
     [Output('stock-graph', 'figure'),
-     Output('portfolio-section', 'children'),
-     Output('loading-overlay-stocks', 'style')],
+     Output('loading-overlay-stocks', 'style'),
+     Output('stock-graph-drawn', 'data')],
     [Input('stock-selector', 'value'),
      Input('period-selector-stocks', 'value'),
-     Input('interval-component-stocks', 'n_intervals')]
+     Input('interval-component-stocks', 'n_intervals'),
+     Input('forecast-store-stocks', 'data')],
+    State('stock-graph', 'relayoutData')
 )
-def update_page(selected_stocks, selected_period, n_intervals):
+def update_page(selected_stocks, selected_period, n_intervals, forecast_data, relayout_data):
     if not selected_stocks:
         raise PreventUpdate
         
@@ -210,19 +210,86 @@ def update_page(selected_stocks, selected_period, n_intervals):
     loading_style = {'display': 'flex'}
     
     try:
-        # Buscar dados
-        analyzer = StockAnalyzer(selected_stocks)
-        analyzer.fetch_data(period=selected_period)
+        forecast_stamp = forecast_data['updated_at'] if forecast_data else None
+        if (RESAMPLER_AVAILABLE and dash.ctx.triggered_id == 'interval-component-stocks'
+                and is_zoomed(relayout_data)):
+            # Com zoom, o tick reaplica a janela atual em vez de enviar a figura com a
+            # resolução base (o uirevision mantém o zoom e o relayout não volta a disparar)
+            figure = get_resampled_figure(tuple(selected_stocks), selected_period, forecast_stamp)
+            return figure.construct_update_data_patch(relayout_data), {'display': 'none'}, dash.no_update
         
-        portfolio_analyzer = StockAnalyzer([stock['symbol'] for stock in MY_STOCKS])
-        portfolio_analyzer.fetch_data(period='1d')
+        # Figura já serializada (memorizada); o Dash aceita o dicionário diretamente
+        figure = json_loads(figure_json(tuple(selected_stocks), selected_period, forecast_stamp))
         
         # Esconder loader
         loading_style = {'display': 'none'}
         
-        return analyzer.get_figure(), create_portfolio_summary(portfolio_analyzer), loading_style
+        # Os ticks do intervalo não voltam a pedir o treino das previsões
+        if dash.ctx.triggered_id == 'interval-component-stocks':
+            return figure, loading_style, dash.no_update
+        return figure, loading_style, selected_stocks
     except Exception as e:
         print(f"Erro ao atualizar dados: {str(e)}")
         # Esconder loader em caso de erro
         loading_style = {'display': 'none'}
-        return go.Figure(), html.Div("Erro ao carregar dados"), loading_style
\ No newline at end of file
+        return go.Figure(), loading_style, dash.no_update
+
+if RESAMPLER_AVAILABLE:
+    @dash.callback(
+        Output('stock-graph', 'figure', allow_duplicate=True),
+        Input('stock-graph', 'relayoutData'),
+        [State('stock-selector', 'value'),
+         State('period-selector-stocks', 'value'),
+         State('forecast-store-stocks', 'data')],
+        prevent_initial_call=True
+    )
+    def resample_graph(relayout_data, selected_stocks, selected_period, forecast_data):
+        if not selected_stocks or not relayout_data:
+            raise PreventUpdate
+        # O figure_json pode ter vindo do cache de outro worker: reconstruir a figura se faltar
+        forecast_stamp = forecast_data['updated_at'] if forecast_data else None
+        figure = get_resampled_figure(tuple(selected_stocks), selected_period, forecast_stamp)
+        return figure.construct_update_data_patch(relayout_data)
+
+@dash.callback(
+    Output('prices-store', 'data'),
+    Input('interval-component-stocks', 'n_intervals')
+)
+def update_prices(n_intervals):
+    """Envia para o browser apenas os últimos preços da carteira"""
+    try:
+        # Só os ativos com dados de há mais de 60 segundos voltam a ser buscados
+        PORTFOLIO.refresh_stale(max_age=60, period='1d')
+        return get_last_prices(PORTFOLIO)
+    except Exception as e:
+        print(f"Erro ao atualizar preços: {str(e)}")
+        raise PreventUpdate
+
+@dash.callback(
+    Output('forecast-store-stocks', 'data'),
+    [Input('stock-graph-drawn', 'data'),
+     Input('forecast-interval-stocks', 'n_intervals')],
+    State('forecast-store-stocks', 'data')
+)
+def update_forecasts(selected_stocks, n_intervals, forecast_data):
+    """Treina as previsões depois de o gráfico ser desenhado (com as previsões já em cache)"""
+    # Não depende do seletor: o update_page redesenha logo, sem esperar pelo treino
+    if not selected_stocks:
+        raise PreventUpdate
+    # Redesenho causado pelas próprias previsões: já não há nada para treinar
+    if (dash.ctx.triggered_id == 'stock-graph-drawn' and forecast_data
+            and set(selected_stocks) <= set(forecast_data['symbols'])):
+        raise PreventUpdate
+    
+    analyzer = StockAnalyzer(selected_stocks)
+    analyzer.compute_forecasts()
+    # Alterar o Store faz o gráfico ser redesenhado com as novas previsões
+    return {'symbols': selected_stocks, 'updated_at': time.time()}
+
+# Resumo da carteira calculado e desenhado no browser
+dash.clientside_callback(
+    ClientsideFunction(namespace='portfolio', function_name='render_summary'),
+    Output('portfolio-section', 'children'),
+    Input('prices-store', 'data'),
+    State('portfolio-holdings', 'data')
+)
@@ -5,48 +5,83 @@ from datetime import datetime, timedelta
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from prophet import Prophet
-import requests
+import os
 import time
+import threading
+from utils.cache import cache, get_memoized, with_app_context
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from utils._njit import NUMBA_AVAILABLE
+from utils.indicators import compute_indicators
+from utils.sessions import HTTP_SESSION, YF_SESSION
+
+try:
+    import bottleneck as bn
+except ImportError:
+    bn = None
+
+try:
+    import joblib
+except ImportError:
+    joblib = None
+
+# Símbolos por pedido ao yf.download
+DOWNLOAD_BATCH_SIZE = 20
+
+# Símbolos com indicadores calculados em simultâneo
+MAX_INDICATOR_WORKERS = 8
+
+# Modelos Prophet treinados em simultâneo
+FORECAST_WORKERS = 4
+
+# Modelos Prophet já treinados, guardados em disco por (símbolo, último fecho, taxa)
+PROPHET_MODEL_DIR = './.prophet'
+
+# APIs de câmbio: (URL, exige 'success' na resposta); pedidas em paralelo, vale a primeira resposta válida
+EXCHANGE_RATE_SOURCES = [
+    ('https://api.exchangerate.host/latest?base=EUR&source=ecb', True),
+    ('https://api.frankfurter.app/latest', False),
+]
+EXCHANGE_RATES_TIMEOUT = 5
+EXCHANGE_RATES_TTL = 3600
+# Substituído sempre por inteiro (nunca alterado), por ser lido e escrito por várias threads
+_EXCHANGE_RATES = {'rates': None, 'updated_at': 0}
+# Threads que pedem as APIs de câmbio em simultâneo pela HTTP_SESSION
+_EXCHANGE_RATES_EXECUTOR = ThreadPoolExecutor(max_workers=len(EXCHANGE_RATE_SOURCES))
+
+# Cores diferentes para cada ativo no gráfico
+COLORS = ['#00c853', '#2196f3', '#ff9800', '#e91e63', '#9c27b0', '#00bcd4']
 
 class StockAnalyzer:
     def __init__(self, symbols=None):
         self.symbols = symbols if symbols else []
         self.data = {}
         self.predictions = {}
-        # Buscar taxa de câmbio atual e cachear por 1 hora
-        self.last_rate_update = 0
+        # Último preço de fecho (em EUR) por símbolo
+        self.last_prices = {}
+        # Instante da última busca de cada símbolo (para refresh_stale)
+        self._last_fetch = {}
+        self._refresh_lock = threading.Lock()
+        # Taxas de câmbio partilhadas entre instâncias (cache de 1 hora), obtidas
+        # só na primeira conversão para que criar um analisador não faça pedidos
         self.exchange_rates = None
-        self._update_exchange_rates()
         
     def _update_exchange_rates(self):
         """Atualiza taxas de câmbio se necessário (cache de 1 hora)"""
+        global _EXCHANGE_RATES
         current_time = time.time()
-        if not self.exchange_rates or (current_time - self.last_rate_update) > 3600:
-            self.exchange_rates = self._get_exchange_rates()
-            self.last_rate_update = current_time
+        cached = _EXCHANGE_RATES
+        if not cached['rates'] or (current_time - cached['updated_at']) > EXCHANGE_RATES_TTL:
+            cached = {'rates': self._get_exchange_rates(), 'updated_at': current_time}
+            _EXCHANGE_RATES = cached
+        self.exchange_rates = cached['rates']
     
     def _get_exchange_rates(self):
         """Busca taxas de câmbio atuais"""
         try:
-            # Tentar API do BCE (European Central Bank)
-            response = requests.get('https://api.exchangerate.host/latest?base=EUR&source=ecb')
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('success', False):
-                    return {
-                        'USD': 1/data['rates']['USD'],
-                        'GBP': 1/data['rates']['GBP']
-                    }
-            
-            # Fallback para Frankfurter
-            response = requests.get('https://api.frankfurter.app/latest')
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    'USD': 1/data['rates']['USD'],
-                    'GBP': 1/data['rates']['GBP']
-                }
-            
+            rates = fetch_exchange_rates()
+            if rates:
+                return rates
         except Exception as e:
             print(f"Erro ao buscar taxas de câmbio: {str(e)}")
         
@@ -55,163 +90,203 @@ class StockAnalyzer:
     
     def _convert_to_eur(self, df, symbol):
         """Converte preços para EUR baseado no tipo de ativo"""
+        return convert_to_eur(df, self._get_rate(symbol))
+    
+    def _get_rate(self, symbol):
+        """Taxa de conversão para EUR da moeda em que o ativo é cotado"""
         self._update_exchange_rates()  # Atualizar taxas se necessário
         
         if symbol.endswith('.L'):  # ETFs da LSE (em GBP)
-            rate = self.exchange_rates['GBP']
-        else:  # Ações americanas (em USD)
-            rate = self.exchange_rates['USD']
-        
-        # Criar cópia do DataFrame para evitar modificações no original
-        df = df.copy()
-        
-        # Converter colunas de preço
-        price_columns = ['Open', 'High', 'Low', 'Close']
-        for col in price_columns:
-            if col in df.columns:
-                df[col] = df[col] * rate
-        
-        # Converter volume para unidades inteiras
-        if 'Volume' in df.columns:
-            df['Volume'] = df['Volume'].astype(int)
-        
-        return df
+            return self.exchange_rates['GBP']
+        # Ações americanas (em USD)
+        return self.exchange_rates['USD']
     
     def get_stock_data(self, symbol, period='1d'):
         try:
-            ticker = yf.Ticker(symbol)
-            
-            # Ajustar intervalo baseado no período
-            if period == '1d':
-                end_time = datetime.now()
-                start_time = end_time - timedelta(days=1)
-                df = ticker.history(start=start_time, end=end_time, interval='1m')
-            elif period == '5d':
-                df = ticker.history(period=period, interval='5m')
-            elif period in ['1mo', '3mo']:
-                df = ticker.history(period=period, interval='15m')
-            else:
-                df = ticker.history(period=period, interval='1d')
-            
-            if df.empty:
-                print(f"Nenhum dado encontrado para {symbol}")
-                return None
-            
-            # Verificar qualidade dos dados
-            required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-            if not all(col in df.columns for col in required_columns):
-                print(f"Dados incompletos para {symbol}")
-                return None
-            
-            if df['Close'].isnull().all():
-                print(f"Dados inválidos para {symbol}")
-                return None
-            
-            # Preencher valores nulos com o último valor válido usando ffill()
-            df = df.ffill()
-            
-            return df
-            
+            return fetch_history(symbol, period)
         except Exception as e:
             print(f"Erro ao obter dados para {symbol}: {str(e)}")
             return None
     
     def fetch_data(self, period='1d'):
         print(f"Tentando buscar dados para: {self.symbols} com período {period}")
-        for symbol in self.symbols:
+        self._fetch_symbols(self.symbols, period)
+    
+    def refresh_stale(self, max_age=60, period='1d'):
+        """Volta a buscar só os símbolos cujos dados têm mais de max_age segundos"""
+        with self._refresh_lock:
+            current_time = time.time()
+            stale = [
+                symbol for symbol in self.symbols
+                if current_time - self._last_fetch.get(symbol, 0) >= max_age
+            ]
+            if stale:
+                self._fetch_symbols(stale, period)
+            return stale
+    
+    def _fetch_symbols(self, symbols, period):
+        """Busca os símbolos indicados, converte para EUR e recalcula os seus indicadores"""
+        results = download_batch(tuple(symbols), period) if symbols else {}
+        for symbol in symbols:
             try:
-                df = self.get_stock_data(symbol, period)
+                df = results.get(symbol)
+                if df is None:
+                    # Símbolos que falharam no lote são buscados individualmente
+                    df = self.get_stock_data(symbol, period)
                 if df is not None:
                     # Converter preços para EUR
                     df = self._convert_to_eur(df, symbol)
                     print(f"Dados obtidos para {symbol}: {len(df)} linhas")
                     self.data[symbol] = df
+                    self._last_fetch[symbol] = time.time()
                 else:
                     print(f"Nenhum dado obtido para {symbol}")
             except Exception as e:
                 print(f"Erro ao buscar dados para {symbol}: {str(e)}")
-        self.calculate_indicators()
+        self.calculate_indicators(symbols)
+        # Último fecho de cada símbolo, lido diretamente do array
+        for symbol in symbols:
+            df = self.data.get(symbol)
+            if df is not None and not df.empty:
+                self.last_prices[symbol] = float(df['Close'].to_numpy()[-1])
     
-    def calculate_indicators(self):
-        for symbol in self.data:
-            df = self.data[symbol]
-            if df is None or df.empty:
-                continue
-            
-            # Bandas de Bollinger (20 períodos, 2 desvios padrão)
-            df['MA20'] = df['Close'].rolling(window=20).mean()
-            std = df['Close'].rolling(window=20).std()
-            df['BB_upper'] = df['MA20'] + (std * 2)
-            df['BB_lower'] = df['MA20'] - (std * 2)
-            
-            # MACD (12, 26, 9)
-            exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-            exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-            df['MACD'] = exp1 - exp2
-            df['Signal_Line'] = df['MACD'].ewm(span=9, adjust=False).mean()
-            df['MACD_histogram'] = df['MACD'] - df['Signal_Line']
-            
-            # RSI (14 períodos)
-            delta = df['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            df['RSI'] = 100 - (100 / (1 + rs))
-            
-            # Volume Médio Móvel (20 períodos)
-            df['Volume_MA20'] = df['Volume'].rolling(window=20).mean()
-            
+    def calculate_indicators(self, symbols=None):
+        """Calcula os indicadores dos símbolos indicados (por omissão, todos os carregados)"""
+        symbols = symbols if symbols is not None else list(self.data)
+        frames = {
+            symbol: self.data[symbol] for symbol in symbols
+            if self.data.get(symbol) is not None and not self.data[symbol].empty
+        }
+        if not frames:
+            return
+        
+        if NUMBA_AVAILABLE:
+            # Cada símbolo é independente; os kernels Numba libertam o GIL
+            workers = min(MAX_INDICATOR_WORKERS, len(frames))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = dict(zip(frames, executor.map(self._indicators_for, frames.values())))
+        else:
+            results = self._calculate_indicators_batched(frames)
+        
+        for symbol, indicators in results.items():
+            df = frames[symbol]
+            for column, values in indicators.items():
+                df[column] = values
             self.data[symbol] = df
+    
+    def _indicators_for(self, df):
+        """Calcula os indicadores de um símbolo sem alterar o DataFrame"""
+        close = df['Close'].to_numpy(dtype=np.float64)
+        volume = df['Volume'].to_numpy(dtype=np.float64)
+        
+        if NUMBA_AVAILABLE:
+            return self._calculate_indicators_numba(close, volume)
+        return self._calculate_indicators_numpy(close, volume)
+    
+    def _calculate_indicators_numba(self, close, volume):
+        """Calcula todos os indicadores com os kernels compilados pelo Numba"""
+        (ma20, bb_upper, bb_lower, macd, signal_line,
+         macd_histogram, rsi, volume_ma20) = compute_indicators(close, volume, wilder_rsi=True)
+        
+        return {
+            'MA20': ma20,
+            'BB_upper': bb_upper,
+            'BB_lower': bb_lower,
+            'MACD': macd,
+            'Signal_Line': signal_line,
+            'MACD_histogram': macd_histogram,
+            'RSI': rsi,
+            'Volume_MA20': volume_ma20,
+        }
+    
+    def _calculate_indicators_batched(self, frames):
+        """Calcula os indicadores sem Numba de uma só vez para os símbolos com as mesmas datas"""
+        # Só se juntam símbolos com o mesmo índice: alinhar datas diferentes criaria NaN
+        # que alteram as médias exponenciais de cada um
+        groups = []
+        for symbol, df in frames.items():
+            for index, members in groups:
+                if index.equals(df.index):
+                    members.append(symbol)
+                    break
+            else:
+                groups.append((df.index, [symbol]))
+        
+        results = {}
+        for _, members in groups:
+            # Matrizes (datas x símbolos): cada indicador é uma única chamada para o grupo
+            close = np.column_stack([frames[s]['Close'].to_numpy(dtype=np.float64) for s in members])
+            volume = np.column_stack([frames[s]['Volume'].to_numpy(dtype=np.float64) for s in members])
+            indicators = self._calculate_indicators_numpy(close, volume)
+            for i, symbol in enumerate(members):
+                results[symbol] = {column: values[:, i] for column, values in indicators.items()}
+        return results
+    
+    def _calculate_indicators_numpy(self, close, volume):
+        """Calcula os indicadores com numpy/bottleneck (sem Numba), por coluna se forem matrizes"""
+        # Bandas de Bollinger (20 períodos, 2 desvios padrão)
+        ma20 = move_mean(close, 20)
+        std = move_std(close, 20)
+        
+        # MACD (12, 26, 9)
+        macd = ema(close, 12) - ema(close, 26)
+        signal_line = ema(macd, 9)
+        
+        # RSI de Wilder (14 períodos)
+        delta = np.diff(close, axis=0, prepend=np.nan)
+        gain = wilder_mean(np.where(delta > 0, delta, 0.0), 14)
+        loss = wilder_mean(np.where(delta < 0, -delta, 0.0), 14)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + gain / loss))
+        
+        return {
+            'MA20': ma20,
+            'BB_upper': ma20 + (std * 2),
+            'BB_lower': ma20 - (std * 2),
+            'MACD': macd,
+            'Signal_Line': signal_line,
+            'MACD_histogram': macd - signal_line,
+            'RSI': rsi,
+            # Volume Médio Móvel (20 períodos)
+            'Volume_MA20': move_mean(volume, 20),
+        }
 
+    def compute_forecasts(self, symbols=None, days=30):
+        """Treina (ou reutiliza do cache) as previsões dos símbolos em paralelo"""
+        symbols = symbols if symbols is not None else self.symbols
+        if not symbols:
+            return
+        # O Prophet corre o Stan num processo à parte, por isso as threads paralelizam o treino
+        predict = with_app_context(self.predict_price)
+        workers = min(FORECAST_WORKERS, len(symbols))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda symbol: predict(symbol, days), symbols))
+    
+    def get_cached_forecast(self, symbol, days=30):
+        """Devolve a previsão já calculada para o símbolo, sem treinar o modelo"""
+        if symbol not in self.predictions:
+            result = get_memoized(forecast_price, symbol, days, self._get_rate(symbol))
+            if result is None:
+                return None
+            forecast, historical_data = result
+            self.predictions[symbol] = {
+                'forecast': forecast,
+                'model': None,
+                'historical_data': historical_data
+            }
+        return self.predictions[symbol]['forecast']
+    
     def predict_price(self, symbol, days=30):
         """Faz previsão de preço para os próximos dias"""
         try:
-            ticker = yf.Ticker(symbol)
-            historical_data = ticker.history(period='2y', interval='1d')
-            
-            if historical_data.empty:
-                print(f"Sem dados históricos para {symbol}")
-                return None
-            
-            # Converter dados históricos para EUR
-            historical_data = self._convert_to_eur(historical_data, symbol)
-            
-            if len(historical_data) < 30:
-                print(f"Dados históricos insuficientes para {symbol}")
-                return None
-            
-            prophet_df = pd.DataFrame({
-                'ds': historical_data.index.tz_localize(None),
-                'y': historical_data['Close']
-            }).reset_index(drop=True)
-            
-            prophet_df = prophet_df.dropna()
-            
-            if len(prophet_df) < 30:
-                print(f"Dados insuficientes após limpeza para {symbol}")
+            result = forecast_price(symbol, days, self._get_rate(symbol))
+            if result is None:
                 return None
-            
-            model = Prophet(
-                daily_seasonality=False,
-                weekly_seasonality=True,
-                yearly_seasonality=True,
-                changepoint_prior_scale=0.01,
-                interval_width=0.95
-            )
-            
-            model.add_seasonality(
-                name='monthly',
-                period=30.5,
-                fourier_order=5
-            )
-            
-            model.fit(prophet_df)
-            future_dates = model.make_future_dataframe(periods=days, freq='D')
-            forecast = model.predict(future_dates)
+            forecast, historical_data = result
             
             self.predictions[symbol] = {
                 'forecast': forecast,
-                'model': model,
+                'model': None,  # o modelo não é guardado no cache, só a previsão
                 'historical_data': historical_data
             }
             
@@ -248,168 +323,147 @@ class StockAnalyzer:
             subplot_titles=('Preço e Bandas de Bollinger', 'MACD', 'RSI', 'Volume', 'Previsão')
         )
 
-        colors = ['#00c853', '#2196f3', '#ff9800', '#e91e63', '#9c27b0', '#00bcd4']
-        
+        # Traços juntados numa lista e adicionados de uma só vez (uma única validação)
+        traces = []
+        rows = []
         for idx, symbol in enumerate(self.data):
-            color = colors[idx % len(colors)]
+            color = COLORS[idx % len(COLORS)]
+            fill_color = COLOR_RGBA[idx % len(COLORS)]
             df = self.data[symbol]
             if df is None or df.empty:
                 continue
 
             # Customizar o formato do hover para o candlestick
-            fig.add_trace(
-                go.Candlestick(
-                    x=df.index,
-                    open=df['Open'],
-                    high=df['High'],
-                    low=df['Low'],
-                    close=df['Close'],
-                    name=f"Preço ({symbol})",
-                    showlegend=True,
-                    text=[
-                        f"Data: {x}<br>" +
-                        f"Abertura: €{o:.2f}<br>" +
-                        f"Máxima: €{h:.2f}<br>" +
-                        f"Mínima: €{l:.2f}<br>" +
-                        f"Fechamento: €{c:.2f}"
-                        for x, o, h, l, c in zip(df.index, df['Open'], df['High'], df['Low'], df['Close'])
-                    ],
-                    hoverlabel=dict(
-                        bgcolor="rgba(0,0,0,0.8)",
-                        font_size=12,
-                        font_family="Inter",
-                        namelength=-1  # Mostra o nome completo
-                    )
-                ), row=1, col=1
-            )
+            traces.append(go.Candlestick(
+                x=df.index,
+                open=df['Open'],
+                high=df['High'],
+                low=df['Low'],
+                close=df['Close'],
+                name=f"Preço ({symbol})",
+                showlegend=True,
+                # Formatado no browser, sem gerar um texto por vela
+                yhoverformat='.2f',
+                hoverlabel=dict(
+                    bgcolor="rgba(0,0,0,0.8)",
+                    font_size=12,
+                    font_family="Inter",
+                    namelength=-1  # Mostra o nome completo
+                )
+            ))
+            rows.append(1)
             
             # Customizar hover para MA20 e Bandas de Bollinger
-            fig.add_trace(
-                go.Scatter(
-                    x=df.index, 
-                    y=df['MA20'],
-                    name=f'MA20 ({symbol})',
-                    line=dict(color=color, width=1, dash='dot'),
-                    opacity=0.7,
-                    text=[f"MA20: €{y:.2f}" for y in df['MA20']],
-                    hoverinfo='text+x'
-                ), row=1, col=1
-            )
+            traces.append(go.Scatter(
+                x=df.index, 
+                y=df['MA20'],
+                name=f'MA20 ({symbol})',
+                line=dict(color=color, width=1, dash='dot'),
+                opacity=0.7,
+                hovertemplate='MA20: €%{y:.2f}<extra></extra>'
+            ))
+            rows.append(1)
             
-            fig.add_trace(
-                go.Scatter(
-                    x=df.index, 
-                    y=df['BB_upper'],
-                    name=f'BB Superior ({symbol})',
-                    line=dict(color=color, width=1, dash='dash'),
-                    opacity=0.3,
-                    text=[f"BB Superior: €{y:.2f}" for y in df['BB_upper']],
-                    hoverinfo='text+x'
-                ), row=1, col=1
-            )
+            traces.append(go.Scatter(
+                x=df.index, 
+                y=df['BB_upper'],
+                name=f'BB Superior ({symbol})',
+                line=dict(color=color, width=1, dash='dash'),
+                opacity=0.3,
+                hovertemplate='BB Superior: €%{y:.2f}<extra></extra>'
+            ))
+            rows.append(1)
             
-            fig.add_trace(
-                go.Scatter(
-                    x=df.index, 
-                    y=df['BB_lower'],
-                    name=f'BB Inferior ({symbol})',
-                    line=dict(color=color, width=1, dash='dash'),
-                    opacity=0.3,
-                    fill='tonexty',
-                    text=[f"BB Inferior: €{y:.2f}" for y in df['BB_lower']],
-                    hoverinfo='text+x'
-                ), row=1, col=1
-            )
+            traces.append(go.Scatter(
+                x=df.index, 
+                y=df['BB_lower'],
+                name=f'BB Inferior ({symbol})',
+                line=dict(color=color, width=1, dash='dash'),
+                opacity=0.3,
+                fill='tonexty',
+                hovertemplate='BB Inferior: €%{y:.2f}<extra></extra>'
+            ))
+            rows.append(1)
 
             # Customizar hover para MACD
-            fig.add_trace(
-                go.Scatter(
-                    x=df.index, 
-                    y=df['MACD'],
-                    name=f'MACD ({symbol})',
-                    line=dict(color=color, width=1),
-                    text=[f"MACD: {y:.4f}" for y in df['MACD']],
-                    hoverinfo='text+x'
-                ), row=2, col=1
-            )
+            traces.append(go.Scatter(
+                x=df.index, 
+                y=df['MACD'],
+                name=f'MACD ({symbol})',
+                line=dict(color=color, width=1),
+                hovertemplate='MACD: %{y:.4f}<extra></extra>'
+            ))
+            rows.append(2)
             
-            fig.add_trace(
-                go.Scatter(
-                    x=df.index, 
-                    y=df['Signal_Line'],
-                    name=f'Sinal MACD ({symbol})',
-                    line=dict(color=color, width=1, dash='dot'),
-                    opacity=0.7,
-                    text=[f"Sinal: {y:.4f}" for y in df['Signal_Line']],
-                    hoverinfo='text+x'
-                ), row=2, col=1
-            )
+            traces.append(go.Scatter(
+                x=df.index, 
+                y=df['Signal_Line'],
+                name=f'Sinal MACD ({symbol})',
+                line=dict(color=color, width=1, dash='dot'),
+                opacity=0.7,
+                hovertemplate='Sinal: %{y:.4f}<extra></extra>'
+            ))
+            rows.append(2)
 
             # Customizar hover para RSI
-            fig.add_trace(
-                go.Scatter(
-                    x=df.index, 
-                    y=df['RSI'],
-                    name=f'RSI ({symbol})',
-                    line=dict(color=color, width=1),
-                    text=[f"RSI: {y:.1f}" for y in df['RSI']],
-                    hoverinfo='text+x'
-                ), row=3, col=1
-            )
+            traces.append(go.Scatter(
+                x=df.index, 
+                y=df['RSI'],
+                name=f'RSI ({symbol})',
+                line=dict(color=color, width=1),
+                hovertemplate='RSI: %{y:.1f}<extra></extra>'
+            ))
+            rows.append(3)
 
             # Customizar hover para Volume
-            fig.add_trace(
-                go.Bar(
-                    x=df.index, 
-                    y=df['Volume'],
-                    name=f'Volume ({symbol})',
-                    marker_color=color,
-                    opacity=0.7,
-                    text=[f"Volume: {y:,.0f}" for y in df['Volume']],
-                    hoverinfo='text+x'
-                ), row=4, col=1
-            )
+            traces.append(go.Bar(
+                x=df.index, 
+                y=df['Volume'],
+                name=f'Volume ({symbol})',
+                marker_color=color,
+                opacity=0.7,
+                hovertemplate='Volume: %{y:,.0f}<extra></extra>'
+            ))
+            rows.append(4)
             
             # Customizar hover para Previsão
-            forecast = self.predict_price(symbol)
-            if forecast is not None and symbol in self.predictions:
-                fig.add_trace(
-                    go.Scatter(
-                        x=forecast['ds'], 
-                        y=forecast['yhat'],
-                        name=f'Previsão ({symbol})',
-                        line=dict(color=color, dash='dash'),
-                        mode='lines',
-                        text=[f"Previsão: €{y:.2f}" for y in forecast['yhat']],
-                        hoverinfo='text+x'
-                    ), row=5, col=1
-                )
+            # A previsão é calculada à parte (compute_forecasts); se ainda não existir, fica de fora
+            forecast = self.get_cached_forecast(symbol)
+            if forecast is not None:
+                traces.append(go.Scatter(
+                    x=forecast['ds'], 
+                    y=forecast['yhat'],
+                    name=f'Previsão ({symbol})',
+                    line=dict(color=color, dash='dash'),
+                    mode='lines',
+                    hovertemplate='Previsão: €%{y:.2f}<extra></extra>'
+                ))
+                rows.append(5)
                 
-                fig.add_trace(
-                    go.Scatter(
-                        x=forecast['ds'], 
-                        y=forecast['yhat_upper'],
-                        fill=None,
-                        mode='lines',
-                        line_color='rgba(0,0,0,0)',
-                        showlegend=False,
-                        hoverinfo='skip'
-                    ), row=5, col=1
-                )
+                traces.append(go.Scatter(
+                    x=forecast['ds'], 
+                    y=forecast['yhat_upper'],
+                    fill=None,
+                    mode='lines',
+                    line_color='rgba(0,0,0,0)',
+                    showlegend=False,
+                    hoverinfo='skip'
+                ))
+                rows.append(5)
                 
-                fig.add_trace(
-                    go.Scatter(
-                        x=forecast['ds'], 
-                        y=forecast['yhat_lower'],
-                        fill='tonexty',
-                        mode='lines',
-                        line_color='rgba(0,0,0,0)',
-                        fillcolor=f'rgba({",".join(map(str, hex_to_rgb(color)))},0.2)',
-                        name=f'IC ({symbol})',
-                        text=[f"Intervalo: €{y:.2f}" for y in forecast['yhat_lower']],
-                        hoverinfo='text+x'
-                    ), row=5, col=1
-                )
+                traces.append(go.Scatter(
+                    x=forecast['ds'], 
+                    y=forecast['yhat_lower'],
+                    fill='tonexty',
+                    mode='lines',
+                    line_color='rgba(0,0,0,0)',
+                    fillcolor=fill_color,
+                    name=f'IC ({symbol})',
+                    hovertemplate='Intervalo: €%{y:.2f}<extra></extra>'
+                ))
+                rows.append(5)
+
+        fig.add_traces(traces, rows=rows, cols=1)
 
         # Adicionar linhas de referência do RSI
         fig.add_hline(y=70, line_dash="dash", line_color="red", row=3, col=1)
@@ -462,7 +516,265 @@ class StockAnalyzer:
 
         return fig
 
+def parse_exchange_rates(data, requires_success):
+    """Extrai as taxas USD e GBP (em EUR) da resposta de uma API de câmbio"""
+    if requires_success and not data.get('success', False):
+        return None
+    return {
+        'USD': 1/data['rates']['USD'],
+        'GBP': 1/data['rates']['GBP']
+    }
+
+def _fetch_rate_source(url, requires_success):
+    """Pede as taxas a uma API de câmbio pela sessão HTTP partilhada"""
+    response = HTTP_SESSION.get(url, timeout=EXCHANGE_RATES_TIMEOUT)
+    if response.status_code != 200:
+        return None
+    return parse_exchange_rates(response.json(), requires_success)
+
+def fetch_exchange_rates():
+    """Pede as taxas às duas APIs em simultâneo e usa a primeira resposta válida (ou None)"""
+    futures = [
+        _EXCHANGE_RATES_EXECUTOR.submit(_fetch_rate_source, url, requires_success)
+        for url, requires_success in EXCHANGE_RATE_SOURCES
+    ]
+    try:
+        for future in as_completed(futures):
+            try:
+                rates = future.result()
+            except Exception as e:
+                print(f"Erro ao buscar taxas de câmbio: {str(e)}")
+                continue
+            if rates:
+                return rates
+    finally:
+        for future in futures:
+            future.cancel()
+    return None
+
+def convert_to_eur(df, rate):
+    """Converte as colunas de preço com a taxa indicada (devolve um novo DataFrame)"""
+    # O DataFrame original pode estar no cache, por isso não é alterado; em vez de o
+    # copiar inteiro, cada coluna de preço é convertida uma única vez para float32
+    # (chega para mostrar preços com 2 casas decimais) e as restantes são partilhadas
+    columns = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if col in ('Open', 'High', 'Low', 'Close'):
+            values = values.astype(np.float32)
+            values *= np.float32(rate)
+        elif col == 'Volume':
+            # Converter volume para unidades inteiras (int32 quando o máximo cabe)
+            volume_dtype = np.int32 if values.max() < np.iinfo(np.int32).max else np.int64
+            values = values.astype(volume_dtype, copy=False)
+        columns[col] = values
+    
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+def clean_stock_data(df, symbol):
+    """Valida os dados de um símbolo e preenche valores em falta"""
+    if df is None or df.empty:
+        print(f"Nenhum dado encontrado para {symbol}")
+        return None
+    
+    # Verificar qualidade dos dados
+    required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
+    if not all(col in df.columns for col in required_columns):
+        print(f"Dados incompletos para {symbol}")
+        return None
+    
+    if df['Close'].isnull().all():
+        print(f"Dados inválidos para {symbol}")
+        return None
+    
+    # Preencher valores nulos com o último valor válido usando ffill()
+    return df.ffill()
+
+@cache.memoize(timeout=60)
+def fetch_history(symbol, period):
+    """Histórico de um símbolo no yfinance (em USD/GBP), memorizado durante 60 segundos"""
+    ticker = yf.Ticker(symbol, session=YF_SESSION)
+    
+    # Ajustar intervalo baseado no período
+    if period == '1d':
+        end_time = datetime.now()
+        start_time = end_time - timedelta(days=1)
+        df = ticker.history(start=start_time, end=end_time, interval='1m')
+    else:
+        df = ticker.history(period=period, interval=get_interval(period))
+    
+    return clean_stock_data(df, symbol)
+
+@cache.memoize(timeout=60)
+def download_batch(symbols, period):
+    """Busca vários símbolos num único pedido ao yfinance (em lotes de DOWNLOAD_BATCH_SIZE)"""
+    results = {}
+    for start in range(0, len(symbols), DOWNLOAD_BATCH_SIZE):
+        batch = symbols[start:start + DOWNLOAD_BATCH_SIZE]
+        try:
+            raw = yf.download(
+                tickers=' '.join(batch),
+                period=period,
+                interval=get_interval(period),
+                group_by='ticker',
+                # Preços ajustados (dividendos e splits), como o Ticker.history
+                auto_adjust=True,
+                threads=True,
+                progress=False,
+                session=YF_SESSION
+            )
+        except Exception as e:
+            print(f"Erro ao buscar dados em lote: {str(e)}")
+            continue
+        
+        if raw.empty:
+            continue
+        for symbol in batch:
+            if isinstance(raw.columns, pd.MultiIndex):
+                try:
+                    df = raw[symbol]
+                except KeyError:
+                    continue
+            elif len(batch) == 1:
+                df = raw
+            else:
+                continue
+            df = clean_stock_data(df.dropna(how='all'), symbol)
+            if df is not None:
+                results[symbol] = df
+    
+    return results
+
+@cache.memoize(timeout=3600)
+def forecast_price(symbol, days, rate):
+    """Treina o Prophet com 2 anos de histórico em EUR; devolve (previsão, histórico) ou None"""
+    historical_data = yf.Ticker(symbol, session=YF_SESSION).history(period='2y', interval='1d')
+    
+    if historical_data.empty:
+        print(f"Sem dados históricos para {symbol}")
+        return None
+    
+    # Converter dados históricos para EUR
+    historical_data = convert_to_eur(historical_data, rate)
+    
+    if len(historical_data) < 30:
+        print(f"Dados históricos insuficientes para {symbol}")
+        return None
+    
+    prophet_df = pd.DataFrame({
+        'ds': historical_data.index.tz_localize(None),
+        'y': historical_data['Close'].astype(np.float64)  # o Prophet trabalha em float64
+    }).reset_index(drop=True)
+    
+    prophet_df = prophet_df.dropna()
+    
+    if len(prophet_df) < 30:
+        print(f"Dados insuficientes após limpeza para {symbol}")
+        return None
+    
+    # O modelo só é treinado de novo quando há um novo fecho (no máximo uma vez por dia)
+    last_date = historical_data.index[-1].date()
+    model = load_prophet_model(symbol, last_date, rate)
+    if model is None:
+        model = Prophet(
+            daily_seasonality=False,
+            weekly_seasonality=True,
+            yearly_seasonality=True,
+            changepoint_prior_scale=0.01,
+            interval_width=0.95
+        )
+        
+        model.add_seasonality(
+            name='monthly',
+            period=30.5,
+            fourier_order=5
+        )
+        
+        model.fit(prophet_df)
+        save_prophet_model(model, symbol, last_date, rate)
+    
+    future_dates = model.make_future_dataframe(periods=days, freq='D')
+    forecast = model.predict(future_dates)
+    
+    return forecast, historical_data
+
+def prophet_model_path(symbol, last_date, rate):
+    """Caminho do modelo Prophet guardado para o símbolo, último fecho e taxa de câmbio"""
+    return os.path.join(PROPHET_MODEL_DIR, f"{symbol}_{last_date}_{rate:.6f}.pkl")
+
+def load_prophet_model(symbol, last_date, rate):
+    """Carrega o modelo Prophet já treinado (ou None se não existir)"""
+    path = prophet_model_path(symbol, last_date, rate)
+    if joblib is None or not os.path.exists(path):
+        return None
+    try:
+        return joblib.load(path)
+    except Exception as e:
+        print(f"Erro ao carregar o modelo de {symbol}: {str(e)}")
+        return None
+
+def save_prophet_model(model, symbol, last_date, rate):
+    """Guarda o modelo treinado e apaga os modelos antigos do mesmo símbolo"""
+    if joblib is None:
+        return
+    path = prophet_model_path(symbol, last_date, rate)
+    try:
+        os.makedirs(PROPHET_MODEL_DIR, exist_ok=True)
+        for name in os.listdir(PROPHET_MODEL_DIR):
+            old_path = os.path.join(PROPHET_MODEL_DIR, name)
+            if name.startswith(f"{symbol}_") and name.endswith(".pkl") and old_path != path:
+                os.remove(old_path)
+        # Escrever num ficheiro temporário para outro worker nunca ler um modelo incompleto
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(model, tmp_path)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Erro ao guardar o modelo de {symbol}: {str(e)}")
+
+def move_mean(x, window):
+    """Média móvel (NaN enquanto a janela não está completa, como no pandas), por coluna"""
+    if len(x) < window:
+        # O bottleneck rejeita janelas maiores que a série; o pandas devolve só NaN
+        return np.full(x.shape, np.nan)
+    if bn is not None:
+        return bn.move_mean(x, window, axis=0)
+    return pd.DataFrame(x).rolling(window=window).mean().to_numpy().reshape(x.shape)
+
+def move_std(x, window):
+    """Desvio padrão móvel amostral (ddof=1, como no rolling().std() do pandas), por coluna"""
+    if len(x) < window:
+        return np.full(x.shape, np.nan)
+    if bn is not None:
+        return bn.move_std(x, window, axis=0, ddof=1)
+    return pd.DataFrame(x).rolling(window=window).std().to_numpy().reshape(x.shape)
+
+def ema(x, span):
+    """Média móvel exponencial (adjust=False) sobre um array, por coluna se for uma matriz"""
+    return pd.DataFrame(x).ewm(span=span, adjust=False).mean().to_numpy().reshape(x.shape)
+
+def wilder_mean(x, window):
+    """Média de Wilder (alpha = 1/window, iniciada pela média simples) das variações x[1:], por coluna"""
+    seeded = np.full(x.shape, np.nan)
+    if len(x) > window:
+        seeded[window] = x[1:window + 1].mean(axis=0)
+        seeded[window + 1:] = x[window + 1:]
+    return pd.DataFrame(seeded).ewm(alpha=1.0 / window, adjust=False).mean().to_numpy().reshape(x.shape)
+
+def get_interval(period):
+    """Intervalo das velas usado para cada período"""
+    if period == '1d':
+        return '1m'
+    if period == '5d':
+        return '5m'
+    if period in ['1mo', '3mo']:
+        return '15m'
+    return '1d'
+
+@lru_cache(maxsize=None)
 def hex_to_rgb(hex_color):
     """Converte cor hexadecimal para RGB"""
     hex_color = hex_color.lstrip('#')
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4)) 
\ No newline at end of file
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+# Cores de preenchimento do intervalo de previsão, calculadas uma só vez
+COLOR_RGBA = [f'rgba({r},{g},{b},0.2)' for r, g, b in map(hex_to_rgb, COLORS)] 
@@ -0,0 +1,81 @@
+"""Cache partilhado entre processos (Flask-Caching) para memorizar downloads e previsões"""
+import functools
+import time
+
+try:
+    from flask import current_app, has_app_context
+    from flask_caching import Cache
+    FLASK_CACHING_AVAILABLE = True
+except ImportError:
+    FLASK_CACHING_AVAILABLE = False
+
+# Cache em disco: os workers do gunicorn não partilham memória entre si
+CACHE_CONFIG = {
+    'CACHE_TYPE': 'FileSystemCache',
+    'CACHE_DIR': './.cache',
+    'CACHE_DEFAULT_TIMEOUT': 60,
+}
+
+class _LocalCache:
+    """Substituto em memória (por processo) quando o Flask-Caching não está instalado"""
+
+    def __init__(self):
+        self._values = {}
+
+    def init_app(self, server):
+        pass
+
+    def get(self, key):
+        cached = self._values.get(key)
+        if cached is not None and time.time() - cached[1] < cached[2]:
+            return cached[0]
+        return None
+
+    def memoize(self, timeout=None):
+        timeout = timeout or CACHE_CONFIG['CACHE_DEFAULT_TIMEOUT']
+
+        def decorator(func):
+            def make_cache_key(f, *args):
+                return (f.__qualname__, args)
+
+            @functools.wraps(func)
+            def wrapper(*args):
+                key = make_cache_key(func, *args)
+                value = self.get(key)
+                if value is not None:
+                    return value
+                value = func(*args)
+                if value is not None:  # como no Flask-Caching, None não é guardado
+                    self._values[key] = (value, time.time(), timeout)
+                return value
+            wrapper.uncached = func
+            wrapper.make_cache_key = make_cache_key
+            return wrapper
+        return decorator
+
+cache = Cache(config=CACHE_CONFIG) if FLASK_CACHING_AVAILABLE else _LocalCache()
+
+def init_cache(server):
+    """Associa o cache ao servidor Flask da aplicação Dash"""
+    cache.init_app(server)
+
+def get_memoized(func, *args):
+    """Devolve o valor já memorizado de func(*args) sem o calcular (ou None)"""
+    try:
+        return cache.get(func.make_cache_key(func.uncached, *args))
+    except Exception as e:
+        # Sem contexto da aplicação Flask não há acesso ao cache
+        print(f"Erro ao ler o cache: {str(e)}")
+        return None
+
+def with_app_context(func):
+    """Envolve func para ser chamada noutra thread com o contexto da aplicação atual"""
+    if not FLASK_CACHING_AVAILABLE or not has_app_context():
+        return func
+    app = current_app._get_current_object()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with app.app_context():
+            return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,144 @@
+"""Kernels Numba dos indicadores técnicos, partilhados pelos analisadores de cripto e ações"""
+import numpy as np
+from utils._njit import njit, NUMBA_AVAILABLE
+
+# fastmath sem 'nnan'/'ninf': os kernels dependem de np.isnan para valores em falta
+# nogil permite calcular vários símbolos em paralelo com threads
+FASTMATH_FLAGS = {'nsz', 'arcp', 'contract', 'afn', 'reassoc'}
+
+def warmup_indicators():
+    """Compila antecipadamente os kernels Numba com uma série curta"""
+    if NUMBA_AVAILABLE:
+        dummy = np.linspace(1.0, 2.0, 64)
+        compute_indicators(dummy, dummy)
+
+@njit(cache=True, nogil=True, fastmath=FASTMATH_FLAGS)
+def _rolling_mean_std(x, window):
+    """Média e desvio padrão (ddof=1) móveis numa única passagem (Welford deslizante)"""
+    n = x.size
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    m = 0.0
+    m2 = 0.0
+    nans = 0
+    ready = False  # m e m2 correspondem à janela atual
+    for i in range(n):
+        if np.isnan(x[i]):
+            nans += 1
+        if i >= window and np.isnan(x[i - window]):
+            nans -= 1
+        if i < window - 1 or nans > 0:
+            ready = False
+            continue
+        if not ready:
+            # (Re)iniciar a janela no arranque ou depois de valores em falta
+            m = 0.0
+            m2 = 0.0
+            for k in range(window):
+                value = x[i - window + 1 + k]
+                delta = value - m
+                m += delta / (k + 1)
+                m2 += delta * (value - m)
+            ready = True
+        else:
+            new = x[i]
+            old = x[i - window]
+            new_m = m + (new - old) / window
+            m2 += (new - old) * (new - new_m + old - m)
+            m = new_m
+        mean[i] = m
+        std[i] = np.sqrt(m2 / (window - 1)) if m2 > 0.0 else 0.0
+    return mean, std
+
+@njit(cache=True, nogil=True, fastmath=FASTMATH_FLAGS)
+def _ema(x, span):
+    """Média móvel exponencial equivalente a ewm(span, adjust=False) (ignore_na=False)"""
+    alpha = 2.0 / (span + 1.0)
+    out = np.empty(x.size)
+    prev = np.nan
+    old_weight = 1.0
+    for i in range(x.size):
+        value = x[i]
+        if np.isnan(prev):
+            if not np.isnan(value):
+                prev = value
+                old_weight = 1.0
+        else:
+            # Como no pandas, cada falha continua a reduzir o peso do valor anterior
+            old_weight *= 1.0 - alpha
+            if not np.isnan(value):
+                prev = (old_weight * prev + alpha * value) / (old_weight + alpha)
+                old_weight = 1.0
+        out[i] = prev
+    return out
+
+@njit(cache=True, nogil=True, fastmath=FASTMATH_FLAGS)
+def _rsi(close, window):
+    """RSI com médias simples de ganhos e perdas"""
+    n = close.size
+    out = np.full(n, np.nan)
+    gains = np.zeros(n)
+    losses = np.zeros(n)
+    for i in range(1, n):
+        delta = close[i] - close[i - 1]
+        if delta > 0:
+            gains[i] = delta
+        elif delta < 0:
+            losses[i] = -delta
+    total_gain = 0.0
+    total_loss = 0.0
+    for i in range(n):
+        total_gain += gains[i]
+        total_loss += losses[i]
+        if i >= window:
+            total_gain -= gains[i - window]
+            total_loss -= losses[i - window]
+        if i >= window - 1:
+            avg_gain = total_gain / window
+            avg_loss = total_loss / window
+            if avg_loss == 0.0:
+                out[i] = 100.0 if avg_gain > 0.0 else np.nan
+            else:
+                out[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return out
+
+@njit(cache=True, nogil=True, fastmath=FASTMATH_FLAGS)
+def _wilder_rsi(close, window):
+    """RSI de Wilder: médias de ganhos e perdas alisadas com alpha = 1/window numa só passagem"""
+    n = close.size
+    out = np.full(n, np.nan)
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, n):
+        delta = close[i] - close[i - 1]
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        if i <= window:
+            # Primeiras médias: médias simples das primeiras 'window' variações
+            avg_gain += gain / window
+            avg_loss += loss / window
+            if i < window:
+                continue
+        else:
+            avg_gain = (avg_gain * (window - 1) + gain) / window
+            avg_loss = (avg_loss * (window - 1) + loss) / window
+        if avg_loss == 0.0:
+            out[i] = 100.0 if avg_gain > 0.0 else np.nan
+        else:
+            out[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return out
+
+@njit(cache=True, nogil=True, fastmath=FASTMATH_FLAGS)
+def compute_indicators(close, volume, wilder_rsi=False):
+    """Bollinger, MACD, RSI (simples ou de Wilder) e média do volume sobre arrays float64"""
+    ma20, std20 = _rolling_mean_std(close, 20)
+    bb_upper = ma20 + std20 * 2
+    bb_lower = ma20 - std20 * 2
+    
+    macd = _ema(close, 12) - _ema(close, 26)
+    signal_line = _ema(macd, 9)
+    macd_histogram = macd - signal_line
+    
+    rsi = _wilder_rsi(close, 14) if wilder_rsi else _rsi(close, 14)
+    volume_ma20, _ = _rolling_mean_std(volume, 20)
+    return ma20, bb_upper, bb_lower, macd, signal_line, macd_histogram, rsi, volume_ma20
@@ -0,0 +1,47 @@
+"""Sessões HTTP partilhadas pelos analisadores de cripto e ações"""
+from datetime import timedelta
+
+import requests
+import yfinance as yf
+from requests.adapters import HTTPAdapter
+
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None
+
+# Ligações mantidas abertas por anfitrião (downloads em paralelo)
+POOL_SIZE = 10
+
+def _mount_pool(session):
+    """Aumenta o número de ligações keep-alive da sessão"""
+    session.mount('https://', HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE))
+    return session
+
+def _yfinance_accepts_requests_session():
+    """O yfinance 0.2.54+ usa sessões curl_cffi e rejeita as do requests/requests_cache"""
+    try:
+        version = tuple(int(part) for part in yf.__version__.split('.')[:3])
+    except ValueError:
+        return False
+    return version < (0, 2, 54)
+
+# Sessão keep-alive para as APIs de câmbio
+HTTP_SESSION = _mount_pool(requests.Session())
+
+# Sessão única do yfinance para as duas páginas: o yfinance guarda a sessão num singleton
+# do processo, por isso sessões diferentes por analisador substituir-se-iam uma à outra.
+# Com o requests_cache os pedidos expiram ao fim de 1 minuto (incluindo as velas diárias
+# dos gráficos, cuja última vela ainda está em curso); só o histórico do Prophet, pedido
+# com datas fixas até ao início do dia, fica 6 horas. Nas versões que não aceitam sessões
+# do requests fica None e o yfinance usa a sua própria sessão.
+if not _yfinance_accepts_requests_session():
+    YF_SESSION = None
+elif requests_cache is not None:
+    YF_SESSION = _mount_pool(requests_cache.CachedSession(
+        'yfinance.cache',
+        expire_after=timedelta(minutes=1),
+        urls_expire_after={'*/v8/finance/chart*period1=*interval=1d*': timedelta(hours=6)}
+    ))
+else:
+    YF_SESSION = HTTP_SESSION
@@ -0,0 +1,4 @@
+from main import server
+
+# Ponto de entrada para o gunicorn: gunicorn --chdir src wsgi:server
+application = server